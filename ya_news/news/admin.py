@@ -13,3 +13,5 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('comment_count',)
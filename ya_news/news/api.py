@@ -0,0 +1,150 @@
+"""
+JSON API для мобильного клиента: только чтение.
+
+Строки читаются через values() и уходят в JSON как есть, без
+создания моделей и отрисовки шаблонов. Параметр fields выбирает поля
+ответа (?fields=title,comment_count); id и поля, по которым строится
+курсор, возвращаются всегда. Списки листаются курсором, как и HTML-
+страницы: ссылка на продолжение — в next.
+"""
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.views import generic
+
+from .cache import AnonymousPageCacheMixin, detail_scope
+from .fragments import COMMENTS_ORDERING
+from .models import Comment, News
+from .pagination import paginate_keyset
+from .queries import QueryBudgetMixin
+from .views import NewsList
+
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder,
+        json_dumps_params=JSON_PARAMS
+    )
+
+
+class ApiView(QueryBudgetMixin, AnonymousPageCacheMixin, generic.View):
+    """
+    Основа представлений API.
+
+    fields — допустимые поля, default_fields — поля без параметра
+    fields, field_paths — пути в ORM для полей из связанных моделей.
+    """
+    http_method_names = ['get', 'head', 'options']
+    fields = ()
+    default_fields = ()
+    always_fields = ('id',)
+    field_paths = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error:
+            return json_response({'error': str(error)}, status=404)
+        except BadRequest as error:
+            return json_response({'error': str(error)}, status=400)
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return self.default_fields
+        fields = requested.split(',')
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise BadRequest(
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            )
+        return tuple(dict.fromkeys((*self.always_fields, *fields)))
+
+    def get_paths(self):
+        return [self.field_paths.get(name, name) for name in self.get_fields()]
+
+    def rename(self, rows):
+        """Ключи связанных полей — имена полей API, а не пути ORM."""
+        renames = [
+            (path, name) for name, path in self.field_paths.items()
+            if path in self.get_paths()
+        ]
+        for row in rows:
+            for path, name in renames:
+                row[name] = row.pop(path)
+        return rows
+
+    def paginate(self, queryset, per_page):
+        """Страница по курсору; испорченный курсор — ошибка клиента."""
+        try:
+            return paginate_keyset(
+                queryset, self.keyset_ordering,
+                self.request.GET.get('cursor'), per_page
+            )
+        except Http404:
+            raise BadRequest('Некорректный курсор.')
+
+    def page_response(self, page):
+        next_url = None
+        if page.has_next:
+            query = self.request.GET.copy()
+            query['cursor'] = page.next_cursor
+            next_url = f'{self.request.path}?{query.urlencode()}'
+        return json_response({
+            'results': self.rename(page.object_list),
+            'next': next_url,
+        })
+
+
+class NewsListApi(ApiView):
+    fields = ('id', 'title', 'date', 'excerpt', 'text', 'comment_count')
+    default_fields = ('id', 'title', 'date', 'excerpt', 'comment_count')
+    always_fields = ('id', 'date')
+    keyset_ordering = NewsList.keyset_ordering
+    query_budget = 1
+
+    def get(self, request):
+        page = self.paginate(
+            News.objects.values(*self.get_paths()),
+            settings.NEWS_COUNT_ON_HOME_PAGE
+        )
+        return self.page_response(page)
+
+
+class NewsDetailApi(ApiView):
+    fields = ('id', 'title', 'date', 'excerpt', 'text', 'comment_count')
+    default_fields = ('id', 'title', 'date', 'text', 'comment_count')
+    query_budget = 1
+
+    def get_cache_scopes(self):
+        return (detail_scope(self.kwargs['pk']),)
+
+    def get(self, request, pk):
+        news = News.objects.filter(pk=pk).values(*self.get_paths()).first()
+        if news is None:
+            raise Http404('Новость не найдена.')
+        return json_response(news)
+
+
+class NewsCommentsApi(ApiView):
+    fields = ('id', 'created', 'author', 'text', 'text_html')
+    default_fields = ('id', 'created', 'author', 'text')
+    always_fields = ('id', 'created')
+    field_paths = {'author': 'author__username'}
+    keyset_ordering = COMMENTS_ORDERING
+    query_budget = 2
+
+    def get_cache_scopes(self):
+        return (detail_scope(self.kwargs['pk']),)
+
+    def get(self, request, pk):
+        page = self.paginate(
+            Comment.objects.filter(news_id=pk).values(*self.get_paths()),
+            settings.COMMENTS_COUNT_ON_PAGE
+        )
+        if not page and not News.objects.filter(pk=pk).exists():
+            raise Http404('Новость не найдена.')
+        return self.page_response(page)
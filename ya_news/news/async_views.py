@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+
+from .cache import LIST_SCOPE, detail_scope, get_cached_page, store_page
+from .forms import CommentForm
+from .fragments import render_comments
+from .models import News
+from .pagination import paginate_keyset
+from .views import NewsDetailView, NewsList
+
+# ORM, кеш и шаблоны синхронные: выполняем их в ограниченном пуле
+# потоков, чтобы не блокировать цикл событий и не плодить соединения.
+executor = ThreadPoolExecutor(
+    max_workers=settings.NEWS_ASYNC_THREADS,
+    thread_name_prefix='news-async'
+)
+
+
+def _call(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Копия контекста: привязка к основной базе после записи
+    # (yanews.routers) не должна остаться в потоке пула.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor, partial(context.run, _call, func, *args, **kwargs)
+    )
+
+
+async def cached_page(request, scopes, build):
+    """Страница из кеша для анонимов или результат build()."""
+    key, response = await run_in_pool(get_cached_page, request, scopes)
+    if response is not None:
+        return response
+
+    def build_and_store():
+        response = build()
+        if key is not None:
+            store_page(key, response)
+        return response
+
+    return await run_in_pool(build_and_store)
+
+
+async def news_list(request):
+    """Асинхронная версия NewsList."""
+
+    def build():
+        page = paginate_keyset(
+            News.objects.for_list(),
+            NewsList.keyset_ordering,
+            request.GET.get('cursor'),
+            settings.NEWS_COUNT_ON_HOME_PAGE
+        )
+        return HttpResponse(render_to_string('news/home.html', {
+            'object_list': page.object_list,
+            'page_obj': page,
+        }, request))
+
+    return await cached_page(request, (LIST_SCOPE,), build)
+
+
+async def news_detail(request, pk):
+    """Асинхронная версия NewsDetail; комментарии принимает NewsComment."""
+    if request.method == 'POST':
+        return await run_in_pool(
+            NewsDetailView.comment_view, request, pk=pk
+        )
+
+    def build():
+        news = get_object_or_404(News, pk=pk)
+        context = {
+            'news': news,
+            'object': news,
+            'comments_html': render_comments(news.pk, request.user),
+        }
+        if request.user.is_authenticated:
+            context['form'] = CommentForm()
+        return HttpResponse(
+            render_to_string('news/detail.html', context, request)
+        )
+
+    return await cached_page(request, (detail_scope(pk),), build)
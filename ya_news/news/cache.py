@@ -0,0 +1,228 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_etags, quote_etag
+
+LIST_SCOPE = 'list'
+# Входит в версии каждой страницы и фрагмента.
+ALL_SCOPE = 'all'
+VERSION_KEY = 'news:version:{scope}'
+PAGE_KEY = 'news:page:{path}:{versions}'
+FRAGMENT_KEY = 'news:fragment:{name}:{versions}'
+STATS_KEY = 'news:stats:{name}'
+
+
+def get_cache():
+    return caches[settings.NEWS_PAGE_CACHE_ALIAS]
+
+
+def detail_scope(news_id):
+    return f'detail:{news_id}'
+
+
+def get_versions(*scopes):
+    """
+    Возвращает текущие версии областей кеша.
+
+    Отсутствующую версию (например, вытесненную из кеша) начинаем
+    с текущего времени, чтобы она не совпала ни с одной из прежних.
+    Первой идёт версия ALL_SCOPE: её повышение сбрасывает весь кеш
+    страниц и фрагментов.
+    """
+    cache = get_cache()
+    keys = [
+        VERSION_KEY.format(scope=scope) for scope in (ALL_SCOPE, *scopes)
+    ]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_versions(*scopes):
+    """Делает недействительными все страницы указанных областей."""
+    cache = get_cache()
+    for scope in scopes:
+        key = VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_versions_on_commit(*scopes, using=DEFAULT_DB_ALIAS):
+    """
+    То же, что bump_versions, но после коммита транзакции.
+
+    Иначе другой запрос успеет собрать страницу из ещё не
+    закоммиченных данных и сохранить её под новой версией.
+    """
+    transaction.on_commit(lambda: bump_versions(*scopes), using=using)
+
+
+def get_page_key(request, versions):
+    path = hashlib.md5(
+        request.get_full_path().encode()
+    ).hexdigest()
+    return PAGE_KEY.format(
+        path=path,
+        versions='.'.join(map(str, versions))
+    )
+
+
+def get_fragment(name, scopes, render):
+    """
+    HTML-фрагмент, общий для всех читателей.
+
+    render() вызывается только при промахе; фрагмент не должен
+    зависеть от пользователя.
+    """
+    cache = get_cache()
+    key = FRAGMENT_KEY.format(
+        name=name, versions='.'.join(map(str, get_versions(*scopes)))
+    )
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html)
+    return html
+
+
+def _count(name):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов страничного кеша."""
+    cache = get_cache()
+    names = ('hits', 'misses')
+    values = cache.get_many(STATS_KEY.format(name=name) for name in names)
+    return {
+        name: values.get(STATS_KEY.format(name=name), 0) for name in names
+    }
+
+
+class VersionedPageMixin:
+    """Области кеша, от которых зависит страница."""
+    cache_scopes = (LIST_SCOPE,)
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+
+class ConditionalGetMixin(VersionedPageMixin):
+    """
+    Отвечает 304 Not Modified, если страница не менялась.
+
+    ETag строится до обращения к базе из URL, версий областей кеша и
+    того, для кого отрисована страница. Версии меняются при каждой
+    записи новостей и комментариев, в том числе при правке и удалении,
+    поэтому Last-Modified не отправляем: время по данным страницы
+    может не сдвинуться или уйти назад.
+    """
+
+    def get_viewer(self):
+        """
+        Для вошедшего пользователя — ещё сессия и CSRF-токен.
+
+        Страница с формой, закешированная клиентом до входа или в
+        прошлой сессии, не должна вернуться к нему с чужим токеном.
+        """
+        if not self.request.user.is_authenticated:
+            return None
+        return (
+            self.request.user.pk,
+            self.request.session.session_key,
+            self.request.META.get('CSRF_COOKIE'),
+        )
+
+    def object_exists(self):
+        """
+        Есть ли объект страницы.
+
+        ETag по версиям совпадает только с выданным для существующей
+        страницы, а «If-None-Match: *» совпадает с любым: для него
+        наличие объекта проверяем запросом.
+        """
+        return True
+
+    def get_etag(self):
+        raw = repr((
+            self.request.get_full_path(),
+            self.get_viewer(),
+            get_versions(*self.get_cache_scopes()),
+        ))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag = self.get_etag()
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if parse_etags(if_none_match) != ['*'] or self.object_exists():
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.setdefault('ETag', etag)
+        return response
+
+
+def get_cached_page(request, scopes):
+    """
+    Ищет страницу в кеше для анонимного GET-запроса.
+
+    Возвращает пару (ключ, ответ): ключ None — страницу кешировать
+    нельзя, ответ None — страницы в кеше пока нет.
+    """
+    if (
+        request.method not in ('GET', 'HEAD')
+        or request.user.is_authenticated
+    ):
+        return None, None
+    key = get_page_key(request, get_versions(*scopes))
+    response = get_cache().get(key)
+    _count('misses' if response is None else 'hits')
+    return key, response
+
+
+def store_page(key, response):
+    if response.status_code != 200:
+        return
+    if hasattr(response, 'render') and callable(response.render):
+        response.add_post_render_callback(
+            lambda rendered: get_cache().set(key, rendered)
+        )
+    else:
+        get_cache().set(key, response)
+
+
+class AnonymousPageCacheMixin(VersionedPageMixin):
+    """
+    Кеширует целые страницы для анонимных пользователей.
+
+    Ключ страницы включает URL и версии областей, от которых она
+    зависит, поэтому при изменении данных страница перестраивается сразу.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        key, response = get_cached_page(request, self.get_cache_scopes())
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if key is not None:
+            store_page(key, response)
+        return response
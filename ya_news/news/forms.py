@@ -2,6 +2,7 @@ from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
 from .models import Comment
+from .profanity import DictionaryMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +11,12 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = DictionaryMatcher(BAD_WORDS)
+
+
+def has_bad_words(text):
+    return bad_words.search(text) is not None
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +27,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if has_bad_words(text):
+            raise ValidationError(WARNING)
         return text
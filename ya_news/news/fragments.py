@@ -0,0 +1,61 @@
+"""
+Список комментариев, общий для всех читателей.
+
+Фрагмент не зависит от пользователя: вместо ссылок «Редактировать» и
+«Удалить» в нём стоят метки с id комментария и автора. Свои ссылки
+пользователь получает уже после кеша — заменой меток, без запросов.
+"""
+import re
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import detail_scope, get_fragment
+from .models import Comment
+from .pagination import paginate_keyset
+
+COMMENTS_ORDERING = ('created', 'id')
+ACTIONS_MARK = re.compile(r'<!--comment-actions:(\d+):(\d+)-->')
+
+
+def add_comment_actions(html, user):
+    """
+    Подставляет ссылки управления в комментарии пользователя.
+
+    Остальные метки удаляются: id авторов не должны попасть к читателю
+    и в общий кеш страниц.
+    """
+    if not user.is_authenticated:
+        return mark_safe(ACTIONS_MARK.sub('', html))
+    author_id = str(user.pk)
+
+    def replace(match):
+        comment_id, comment_author_id = match.groups()
+        if comment_author_id != author_id:
+            return ''
+        return render_to_string(
+            'includes/comment_actions.html', {'comment_id': comment_id}
+        )
+
+    return mark_safe(ACTIONS_MARK.sub(replace, html))
+
+
+def render_comments(news_id, user):
+    """Первая страница комментариев к новости для пользователя."""
+
+    def render():
+        comments = paginate_keyset(
+            Comment.objects.filter(news_id=news_id).for_thread(),
+            COMMENTS_ORDERING,
+            None,
+            settings.COMMENTS_COUNT_ON_PAGE
+        )
+        return render_to_string(
+            'news/comments.html', {'comments': comments, 'news_id': news_id}
+        )
+
+    html = get_fragment(
+        f'comments:{news_id}', (detail_scope(news_id),), render
+    )
+    return add_comment_actions(html, user)
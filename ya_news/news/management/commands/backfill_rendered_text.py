@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import ALL_SCOPE, bump_versions
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет News.excerpt и Comment.text_html. Нужен после '
+        'правок текста в обход save() и смены правил отрисовки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def read_chunks(self, queryset, batch_size):
+        """
+        Пачки объектов по возрастанию id, каждая — отдельным запросом.
+
+        Курсор не остаётся открытым, пока bulk_update пишет в ту же
+        таблицу: в SQLite такое чтение может пропустить или повторить
+        строки.
+        """
+        last_pk = 0
+        while True:
+            chunk = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+            )
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1].pk
+
+    def backfill(self, queryset, fill, field, batch_size):
+        updated = 0
+        for chunk in self.read_chunks(queryset, batch_size):
+            for obj in chunk:
+                fill(obj)
+            with transaction.atomic():
+                queryset.bulk_update(chunk, [field])
+            updated += len(chunk)
+        return updated
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        news = self.backfill(
+            News.objects.only('text'), News.fill_excerpt, 'excerpt',
+            batch_size
+        )
+        comments = self.backfill(
+            Comment.objects.only('text'), Comment.fill_text_html,
+            'text_html', batch_size
+        )
+        # Страницы в кеше собраны со старыми значениями.
+        bump_versions(ALL_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено новостей: {news}, комментариев: {comments}'
+        ))
@@ -0,0 +1,93 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from news.cache import bump_versions, detail_scope
+from news.models import Comment, News
+from yanews.routers import PIN_COOKIE
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает HTML-страницы и JSON API: байты ответа и время '
+        'процессора на запрос. Данные создаются во временной транзакции '
+        'и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        users = get_user_model().objects
+        reader = users.create(username='bench-api-reader')
+        authors = [
+            users.create(username=f'bench-api-{number}')
+            for number in range(10)
+        ]
+        today = date.today()
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {number}',
+                text='Текст новости. ' * 100,
+                date=today - timedelta(days=number),
+            )
+            for number in range(settings.NEWS_COUNT_ON_HOME_PAGE * 3)
+        )
+        news = News.objects.latest('date', 'id')
+        Comment.objects.bulk_create(
+            Comment(
+                news=news,
+                author=authors[number % 10],
+                text=f'Комментарий {number}.\nВторая строка.',
+            )
+            for number in range(settings.COMMENTS_COUNT_ON_PAGE * 3)
+        )
+        # Страницы вошедшего пользователя не кешируются целиком.
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(reader)
+        # Данные не закоммичены: читать их можно только из основной базы.
+        client.cookies[PIN_COOKIE] = '1'
+        pages = (
+            ('список', 'news:home', 'news:api_list', ()),
+            ('новость', 'news:detail', 'news:api_detail', (news.pk,)),
+            (
+                'комментарии', 'news:comments', 'news:api_comments',
+                (news.pk,)
+            ),
+        )
+        self.stdout.write(
+            f'{"":<12} {"HTML, байт":>11} {"JSON, байт":>11} '
+            f'{"HTML, мс":>9} {"JSON, мс":>9}'
+        )
+        for name, html, api, args in pages:
+            html_size, html_cpu = self.measure(
+                client, reverse(html, args=args), news, options['requests']
+            )
+            api_size, api_cpu = self.measure(
+                client, reverse(api, args=args), news, options['requests']
+            )
+            self.stdout.write(
+                f'{name:<12} {html_size:>11} {api_size:>11} '
+                f'{html_cpu:>9.2f} {api_cpu:>9.2f}'
+            )
+
+    def measure(self, client, url, news, count):
+        """Размер ответа и среднее время процессора на запрос, мс."""
+        size = len(client.get(url).content)
+        started = time.process_time()
+        for _ in range(count):
+            # Без кеша фрагмента комментариев: страница строится заново.
+            bump_versions(detail_scope(news.pk))
+            client.get(url)
+        return size, (time.process_time() - started) * 1000 / count
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from news.models import News
+
+
+async def call_asgi(app, path, query_string):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+def call_wsgi(app, path, query_string):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    response = app(environ, lambda status, headers: statuses.append(status))
+    b''.join(response)
+    response.close()
+    return int(statuses[0].split()[0])
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержку асинхронных '
+        'представлений через ASGI и синхронных через WSGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Уникальная строка запроса, чтобы обойти кеш страниц.'
+        )
+
+    def query_string(self, number):
+        return f'bench={number}' if self.cold else ''
+
+    def report(self, name, elapsed, latencies, errors):
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f'{name:<26} {len(latencies) / elapsed:>9.0f} '
+            f'{statistics.median(latencies) * 1000:>9.1f} '
+            f'{p99 * 1000:>9.1f} {errors:>7}'
+        )
+
+    async def run_asgi(self, app, path, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one(number):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                status = await call_asgi(app, path, self.query_string(number))
+                latencies.append(time.perf_counter() - started)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(number) for number in range(total)))
+        return time.perf_counter() - started, latencies, errors
+
+    def run_wsgi(self, app, path, total, concurrency):
+        def one(number):
+            started = time.perf_counter()
+            status = call_wsgi(app, path, self.query_string(number))
+            return time.perf_counter() - started, status != 200
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+        return elapsed, [latency for latency, _ in results], sum(
+            error for _, error in results
+        )
+
+    def handle(self, *args, **options):
+        news = News.objects.first()
+        if news is None:
+            raise CommandError(
+                'В базе нет новостей: загрузите их, например, import_news.'
+            )
+        self.cold = options['cold']
+        total, concurrency = options['requests'], options['concurrency']
+        asgi_app = get_asgi_application()
+        wsgi_app = get_wsgi_application()
+        pages = (
+            ('главная', 'news:home', 'news:home_async', None),
+            ('новость', 'news:detail', 'news:detail_async', (news.pk,)),
+        )
+        self.stdout.write(
+            f'{"":<26} {"запр./с":>9} {"p50, мс":>9} {"p99, мс":>9} '
+            f'{"ошибки":>7}'
+        )
+        for title, name, async_name, args in pages:
+            self.report(
+                f'{title}, WSGI',
+                *self.run_wsgi(
+                    wsgi_app, reverse(name, args=args), total, concurrency
+                )
+            )
+            self.report(
+                f'{title}, ASGI',
+                *asyncio.run(self.run_asgi(
+                    asgi_app, reverse(async_name, args=args),
+                    total, concurrency
+                ))
+            )
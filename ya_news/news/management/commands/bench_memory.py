@@ -0,0 +1,74 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from news.cache import bump_versions, detail_scope
+from news.models import Comment, News
+
+
+def measure(func):
+    """Пик памяти, выделенной за время вызова, в КиБ."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Пик выделенной памяти на загрузку и показ ветки с большим '
+        'числом комментариев. Данные создаются во временной транзакции '
+        'и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=10_000)
+        parser.add_argument('--text-size', type=int, default=1024)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        users = get_user_model().objects
+        reader = users.create(username='bench-memory-reader')
+        authors = [
+            users.create(username=f'bench-memory-{number}')
+            for number in range(20)
+        ]
+        news = News.objects.create(title='Ветка', text='Текст новости')
+        text = 'Длинный комментарий.\n' * (options['text_size'] // 21)
+        Comment.objects.bulk_create(
+            Comment(news=news, author=authors[number % 20], text=text)
+            for number in range(options['comments'])
+        )
+        # Хост из ALLOWED_HOSTS, а не testserver.
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(reader)
+        comments = Comment.objects.filter(news=news)
+
+        def get_detail():
+            # Без кеша фрагмента: список комментариев строится заново.
+            bump_versions(detail_scope(news.pk))
+            client.get(reverse('news:detail', args=(news.pk,)))
+
+        rows = (
+            ('вся ветка, все поля', lambda: list(
+                comments.select_related('author')
+            )),
+            ('вся ветка, for_thread', lambda: list(comments.for_thread())),
+            ('GET новости', get_detail),
+        )
+        self.stdout.write(
+            f'{options["comments"]} комментариев по {len(text)} символов'
+        )
+        for name, func in rows:
+            self.stdout.write(f'{name:<24} {measure(func):>10.0f} КиБ')
@@ -0,0 +1,58 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.forms import BAD_WORDS
+from news.profanity import Automaton
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 12)))
+
+
+def naive_search(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время проверки комментария автоматом и перебором '
+        'слов при растущем словаре.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 1000, 20000]
+        )
+        parser.add_argument('--text-words', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        text = ' '.join(
+            random_word(rng) for _ in range(options['text_words'])
+        )
+        self.stdout.write(
+            f'Длина комментария: {len(text)} символов\n'
+            f'{"слов":>8} {"автомат, мс":>12} {"перебор, мс":>12}'
+        )
+        for size in options['sizes']:
+            words = list(BAD_WORDS) + [
+                random_word(rng) for _ in range(size - len(BAD_WORDS))
+            ]
+            automaton = Automaton(words)
+            repeat = options['repeat']
+            compiled = timeit.timeit(
+                lambda: automaton.search(text), number=repeat
+            ) / repeat
+            naive = timeit.timeit(
+                lambda: naive_search(words, text), number=repeat
+            ) / repeat
+            self.stdout.write(
+                f'{size:>8} {compiled * 1000:>12.3f} {naive * 1000:>12.3f}'
+            )
@@ -0,0 +1,136 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from yanews.sqlite.base import PRAGMAS, apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE news (
+    id INTEGER PRIMARY KEY, title TEXT, date TEXT, comment_count INTEGER
+);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY, news_id INTEGER, text TEXT, created TEXT
+);
+CREATE INDEX comment_news_created ON comment (news_id, created);
+'''
+
+# Профили: PRAGMA и режим BEGIN. «Стандартный» — как у sqlite3 из коробки.
+PROFILES = (
+    ('стандартный', {}, 'DEFERRED'),
+    ('продакшен', PRAGMAS, 'IMMEDIATE'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает файл SQLite параллельными чтениями и записями '
+        'комментариев со стандартными и продакшен-настройками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--news', type=int, default=100)
+
+    def prepare(self, path, news_count):
+        with sqlite3.connect(path) as conn:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                'INSERT INTO news VALUES (?, ?, date(), 0)',
+                ((pk, f'Новость {pk}') for pk in range(1, news_count + 1))
+            )
+
+    def connect(self, path, pragmas):
+        conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        apply_pragmas(conn, pragmas)
+        return conn
+
+    def read(self, conn, pk):
+        conn.execute(
+            'SELECT id, title, comment_count FROM news '
+            'ORDER BY date DESC, id DESC LIMIT 10'
+        ).fetchall()
+        conn.execute(
+            'SELECT text FROM comment WHERE news_id = ? '
+            'ORDER BY created LIMIT 50', (pk,)
+        ).fetchall()
+
+    def write(self, conn, pk, begin):
+        # Как при сохранении комментария: чтение, вставка и пересчёт
+        # счётчика в одной транзакции.
+        conn.execute(f'BEGIN {begin}')
+        try:
+            conn.execute('SELECT id FROM news WHERE id = ?', (pk,))
+            conn.execute(
+                "INSERT INTO comment (news_id, text, created) "
+                "VALUES (?, 'Текст', datetime())", (pk,)
+            )
+            conn.execute(
+                'UPDATE news SET comment_count = comment_count + 1 '
+                'WHERE id = ?', (pk,)
+            )
+            conn.execute('COMMIT')
+        except sqlite3.OperationalError:
+            conn.execute('ROLLBACK')
+            raise
+
+    def worker(self, path, pragmas, operation, stop, counters, key):
+        conn = self.connect(path, pragmas)
+        done = errors = pk = 0
+        while not stop.is_set():
+            pk = pk % self.news_count + 1
+            try:
+                operation(conn, pk)
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with self.lock:
+            counters[key] += done
+            counters['errors'] += errors
+
+    def run(self, path, pragmas, begin, options):
+        stop = threading.Event()
+        counters = {'reads': 0, 'writes': 0, 'errors': 0}
+        jobs = [('reads', self.read)] * options['readers'] + [
+            ('writes', lambda conn, pk: self.write(conn, pk, begin))
+        ] * options['writers']
+        threads = [
+            threading.Thread(
+                target=self.worker,
+                args=(path, pragmas, operation, stop, counters, key),
+            )
+            for key, operation in jobs
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return counters
+
+    def handle(self, *args, **options):
+        self.lock = threading.Lock()
+        self.news_count = options['news']
+        seconds = options['seconds']
+        self.stdout.write(
+            f'{"":<14} {"чтений/с":>10} {"записей/с":>10} {"ошибки":>7}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, begin in PROFILES:
+                path = str(Path(directory) / f'{begin}.sqlite3')
+                self.prepare(path, self.news_count)
+                counters = self.run(path, pragmas, begin, options)
+                self.stdout.write(
+                    f'{name:<14} {counters["reads"] / seconds:>10.0f} '
+                    f'{counters["writes"] / seconds:>10.0f} '
+                    f'{counters["errors"]:>7}'
+                )
@@ -0,0 +1,130 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from news.forms import CommentForm
+from news.models import Comment, News
+from news.pagination import KeysetPage
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PROFILES = (
+    ('без кеша', {'debug': True, 'loaders': UNCACHED_LOADERS}),
+    (
+        'кеширующий',
+        {
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', UNCACHED_LOADERS)
+            ],
+        },
+    ),
+)
+
+
+def make_engine(options):
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': config['OPTIONS']['context_processors'],
+            **options,
+        },
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает главную и страницу новости без кеша шаблонов и с '
+        'кеширующим загрузчиком, выводит число отрисовок в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2)
+
+    def contexts(self):
+        user = get_user_model()(pk=1, username='Читатель')
+        request = RequestFactory().get('/')
+        request.user = user
+        today = date.today()
+        news_list = [
+            News(
+                pk=pk,
+                title=f'Новость {pk}',
+                text='Текст новости. ' * 40,
+                date=today - timedelta(days=pk),
+                comment_count=pk,
+            )
+            for pk in range(1, settings.NEWS_COUNT_ON_HOME_PAGE + 1)
+        ]
+        comments = KeysetPage(
+            [
+                Comment(
+                    pk=pk,
+                    news=news_list[0],
+                    author=user,
+                    text='Комментарий к новости.\n' * 3,
+                    created=timezone.now(),
+                )
+                for pk in range(1, settings.COMMENTS_COUNT_ON_PAGE + 1)
+            ],
+            'cursor'
+        )
+        for news in news_list:
+            news.fill_excerpt()
+        for comment in comments:
+            comment.fill_text_html()
+        return request, (
+            ('news/home.html', {
+                'object_list': news_list,
+                'page_obj': KeysetPage(news_list, 'cursor'),
+            }),
+            ('news/detail.html', {
+                'news': news_list[0],
+                'object': news_list[0],
+                'comments': comments,
+                'news_id': news_list[0].pk,
+                'form': CommentForm(),
+            }),
+        )
+
+    def measure(self, engine, name, context, request, seconds):
+        renders = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            engine.get_template(name).render(context, request)
+            renders += 1
+        return renders / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        request, pages = self.contexts()
+        self.stdout.write(
+            f'{"":<20}' + ''.join(f'{name:>14}' for name, _ in PROFILES)
+        )
+        for name, context in pages:
+            if name == 'news/detail.html':
+                # Список комментариев приходит из кеша фрагментов
+                # (news.fragments) уже готовым.
+                context['comments_html'] = make_engine(
+                    PROFILES[1][1]
+                ).get_template('news/comments.html').render(context)
+            rates = [
+                self.measure(
+                    make_engine(profile), name, context, request,
+                    options['seconds']
+                )
+                for _, profile in PROFILES
+            ]
+            self.stdout.write(
+                f'{name:<20}' + ''.join(f'{rate:>14.0f}' for rate in rates)
+            )
@@ -0,0 +1,151 @@
+import json
+import re
+import time
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from news.models import Comment, News
+
+MODELS = {
+    'news.news': News,
+    'news.comment': Comment,
+}
+READ_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_array(file):
+    """
+    Разбирает JSON-массив объектов по одному элементу.
+
+    В памяти держим только текущий кусок файла, а не весь документ.
+    Разбор идёт по смещению в куске: остаток копируется только при
+    чтении следующего куска, а не после каждой записи.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE)
+    pos = SEPARATORS.match(buffer).end()
+    if not buffer.startswith('[', pos):
+        raise CommandError('Ожидался JSON-массив.')
+    pos += 1
+    eof = False
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Файл обрывается посреди записи.')
+            chunk = file.read(READ_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield record
+
+
+def iter_ndjson(file):
+    for number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Строка {number}: {error}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости и комментарии из JSON-массива '
+        '(формат фикстур) или NDJSON пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=('auto', 'json', 'ndjson'), default='auto'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--model', choices=tuple(MODELS), default='news.news',
+            help='Модель для записей без ключа "model".'
+        )
+
+    def build(self, record, default_model):
+        model = MODELS.get(record.get('model', default_model))
+        if model is None:
+            raise CommandError(f'Неизвестная модель: {record["model"]}')
+        fields = record.get('fields')
+        if fields is None:
+            fields = {
+                name: value for name, value in record.items()
+                if name not in ('model', 'pk')
+            }
+        values = {}
+        try:
+            for name, value in fields.items():
+                field = model._meta.get_field(name)
+                values[field.attname] = field.to_python(value)
+        except (FieldDoesNotExist, ValidationError) as error:
+            raise CommandError(f'{model.__name__}: {error}')
+        return model(pk=record.get('pk'), **values)
+
+    def flush(self, batches, models):
+        """
+        Записывает пачку одной транзакцией.
+
+        Записи с уже занятым pk не пропускаются и не перезаписываются:
+        импорт останавливается на этой пачке, предыдущие остаются.
+        """
+        self.batches += 1
+        try:
+            with transaction.atomic():
+                for model in models:
+                    model.objects.bulk_create(batches[model])
+        except IntegrityError as error:
+            raise CommandError(
+                f'Пачка {self.batches} не загружена: {error}. '
+                f'Загружено до неё: {self.imported}.'
+            )
+        for model in models:
+            self.imported += len(batches[model])
+            batches[model] = []
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.imported = self.batches = 0
+        started = time.monotonic()
+        batches = {News: [], Comment: []}
+        with open(options['path'], encoding='utf-8') as file:
+            data_format = options['format']
+            if data_format == 'auto':
+                first = file.read(1)
+                while first.isspace():
+                    first = file.read(1)
+                data_format = 'json' if first == '[' else 'ndjson'
+                file.seek(0)
+            records = (
+                iter_json_array(file) if data_format == 'json'
+                else iter_ndjson(file)
+            )
+            for record in records:
+                obj = self.build(record, options['model'])
+                batches[type(obj)].append(obj)
+                if len(batches[type(obj)]) >= batch_size:
+                    # Комментарии ссылаются на новости:
+                    # новости из буфера записываем раньше них.
+                    self.flush(
+                        batches,
+                        (News, Comment) if type(obj) is Comment else (News,)
+                    )
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'Загружено: {self.imported}')
+            self.flush(batches, (News, Comment))
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {self.imported}, '
+            f'{self.imported / elapsed if elapsed else 0:.0f} в секунду'
+        ))
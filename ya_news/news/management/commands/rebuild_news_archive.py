@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from news.models import ArchiveMonth
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново считает число новостей по месяцам для архива. '
+        'Нужен после loaddata и правок в обход ORM.'
+    )
+
+    def handle(self, *args, **options):
+        months = ArchiveMonth.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Месяцев в архиве: {months}')
+        )
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from news.forms import has_bad_words
+from news.models import Comment
+
+
+def read_chunks(last_pk, chunk_size):
+    """
+    Пачки (pk, text) по возрастанию id.
+
+    Каждая пачка читается отдельным запросом целиком: курсор не остаётся
+    открытым, пока save_chunk обновляет ту же таблицу, — в SQLite такое
+    чтение может пропустить или повторить строки.
+    """
+    while True:
+        chunk = list(Comment.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values_list('pk', 'text')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def find_flagged(rows):
+    """Та же проверка, что и в CommentForm.clean_text."""
+    return [pk for pk, text in rows if has_bad_words(text)]
+
+
+class InlineExecutor:
+    """Выполняет задачи в текущем процессе (--workers 0)."""
+
+    class Result:
+        def __init__(self, value):
+            self.value = value
+
+        def result(self):
+            return self.value
+
+    def submit(self, func, *args):
+        return self.Result(func(*args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново проверяет все комментарии по текущему словарю '
+        'запрещённых слов и отмечает нарушителей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — проверять в текущем процессе.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл, куда записывается последний проверенный id.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с id из файла --checkpoint.'
+        )
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)['last_pk']
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, path, last_pk):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'last_pk': last_pk}, file)
+        os.replace(tmp_path, path)
+
+    def save_chunk(self, rows, flagged):
+        """Флаг обновляем двумя запросами на весь диапазон id пачки."""
+        chunk = Comment.objects.filter(pk__range=(rows[0][0], rows[-1][0]))
+        chunk.filter(pk__in=flagged).update(flagged=True)
+        chunk.exclude(pk__in=flagged).update(flagged=False)
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        last_pk = 0
+        if options['resume']:
+            if not checkpoint:
+                raise CommandError('--resume требует --checkpoint.')
+            last_pk = self.read_checkpoint(checkpoint)
+        chunks = read_chunks(last_pk, options['chunk_size'])
+        workers = options['workers']
+        executor = (
+            ProcessPoolExecutor(workers, initializer=django.setup)
+            if workers else InlineExecutor()
+        )
+        started = time.monotonic()
+        checked = flagged_total = 0
+        pending = deque()
+        with executor:
+            while True:
+                chunk = next(chunks, None)
+                if chunk:
+                    pending.append(
+                        (chunk, executor.submit(find_flagged, chunk))
+                    )
+                # Держим в памяти не больше двух пачек на процесс.
+                while pending and (
+                    not chunk or len(pending) > 2 * max(workers, 1)
+                ):
+                    done, future = pending.popleft()
+                    flagged = future.result()
+                    self.save_chunk(done, flagged)
+                    checked += len(done)
+                    flagged_total += len(flagged)
+                    if checkpoint:
+                        self.write_checkpoint(checkpoint, done[-1][0])
+                if not chunk:
+                    break
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено комментариев: {checked}, нарушений: '
+            f'{flagged_total}, {checked / elapsed if elapsed else 0:.0f} '
+            'комментариев в секунду'
+        ))
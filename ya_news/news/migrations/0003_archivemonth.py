@@ -0,0 +1,42 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:29
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_archive(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    ArchiveMonth = apps.get_model('news', 'ArchiveMonth')
+    counts = News.objects.order_by().annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).values('year', 'month').annotate(news_count=Count('pk'))
+    ArchiveMonth.objects.bulk_create(ArchiveMonth(**row) for row in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('news_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_archive_month'),
+        ),
+        migrations.RunPython(fill_archive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='flagged',
+            field=models.BooleanField(default=False, help_text='Выставляется командой remoderate_comments', verbose_name='Нарушает правила'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# SQL на момент миграции; news.search может меняться дальше.
+CREATE_TABLE = (
+    'CREATE VIRTUAL TABLE news_search USING fts5('
+    "title, text, content='news_news', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+TRIGGERS = (
+    'CREATE TRIGGER news_search_insert AFTER INSERT ON news_news '
+    'BEGIN INSERT INTO news_search(rowid, title, text) '
+    "VALUES (new.id, replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER news_search_delete AFTER DELETE ON news_news '
+    'BEGIN INSERT INTO news_search(news_search, rowid, title, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER news_search_update '
+    'AFTER UPDATE OF title, text ON news_news '
+    'BEGIN INSERT INTO news_search(news_search, rowid, title, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); "
+    'INSERT INTO news_search(rowid, title, text) '
+    "VALUES (new.id, replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+)
+
+DROP_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS news_search_insert',
+    'DROP TRIGGER IF EXISTS news_search_delete',
+    'DROP TRIGGER IF EXISTS news_search_update',
+)
+
+FILL_INDEX = (
+    'INSERT INTO news_search(rowid, title, text) '
+    "SELECT id, replace(replace(title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM news_news"
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE)
+    for sql in TRIGGERS:
+        schema_editor.execute(sql)
+    schema_editor.execute(FILL_INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TRIGGERS:
+        schema_editor.execute(sql)
+    schema_editor.execute('DROP TABLE IF EXISTS news_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_comment_flagged'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
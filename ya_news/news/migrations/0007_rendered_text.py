@@ -0,0 +1,92 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:56
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+# Значения на момент миграции; news.models и news.search могут
+# меняться дальше.
+EXCERPT_WORDS = 15
+
+SEARCH_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS news_search_insert',
+    'DROP TRIGGER IF EXISTS news_search_delete',
+    'DROP TRIGGER IF EXISTS news_search_update',
+    'CREATE TRIGGER news_search_insert AFTER INSERT ON news_news '
+    'BEGIN INSERT INTO news_search(rowid, title, text) '
+    "VALUES (new.id, replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER news_search_delete AFTER DELETE ON news_news '
+    'BEGIN INSERT INTO news_search(news_search, rowid, title, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER news_search_update '
+    'AFTER UPDATE OF title, text ON news_news '
+    'BEGIN INSERT INTO news_search(news_search, rowid, title, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); "
+    'INSERT INTO news_search(rowid, title, text) '
+    "VALUES (new.id, replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+)
+
+
+def fill_rendered_text(apps, schema_editor):
+    using = schema_editor.connection.alias
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    for model, field, render in (
+        (News, 'excerpt', lambda text: Truncator(text).words(EXCERPT_WORDS)),
+        (Comment, 'text_html', lambda text: linebreaksbr(text, True)),
+    ):
+        queryset = model.objects.using(using).only('text').order_by('pk')
+        last_pk = 0
+        while True:
+            # Пачка читается целиком до bulk_update в ту же таблицу.
+            batch = list(queryset.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not batch:
+                break
+            for obj in batch:
+                setattr(obj, field, render(obj.text))
+            model.objects.using(using).bulk_update(batch, [field])
+            last_pk = batch[-1].pk
+
+
+def recreate_search_triggers(apps, schema_editor):
+    # SQLite добавляет столбец, пересоздавая таблицу news_news,
+    # а вместе со старой таблицей удаляются и её триггеры.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SEARCH_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_search'),
+    ]
+
+    operations = [
+        # При откате триггеры нужны после удаления столбцов.
+        migrations.RunPython(
+            migrations.RunPython.noop, recreate_search_triggers
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Текст, готовый к выводу: экранирован, с <br>'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста для списков, обновляется при сохранении'),
+        ),
+        migrations.RunPython(
+            recreate_search_triggers, migrations.RunPython.noop
+        ),
+        migrations.RunPython(fill_rendered_text, migrations.RunPython.noop),
+    ]
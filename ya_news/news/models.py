@@ -1,22 +1,182 @@
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from .cache import LIST_SCOPE, bump_versions_on_commit, detail_scope
+
+EXCERPT_WORDS = 15
+
+
+def with_derived_field(kwargs, source, derived):
+    """Сохраняет производное поле вместе с исходным при update_fields."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and source in update_fields:
+        kwargs = {**kwargs, 'update_fields': {*update_fields, derived}}
+    return kwargs
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for news in objs:
+            news.fill_excerpt()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        months = Counter((news.date.year, news.date.month) for news in objs)
+        for (year, month), count in months.items():
+            ArchiveMonth.objects.shift(date(year, month, 1), count)
+        bump_versions_on_commit(LIST_SCOPE, using=self.db)
+        return objs
+
+    def for_list(self):
+        """Только то, что выводят списки новостей: без полного текста."""
+        return self.only('title', 'date', 'excerpt', 'comment_count')
+
+    def update_comment_count(self):
+        """Пересчитывает счётчик комментариев по таблице комментариев."""
+        comments = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            count=Count('pk')
+        ).values('count')
+        updated = self.update(
+            comment_count=Coalesce(Subquery(comments), 0)
+        )
+        bump_versions_on_commit(LIST_SCOPE, using=self.db)
+        return updated
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        help_text='Начало текста для списков, обновляется при сохранении'
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def fill_excerpt(self):
+        self.excerpt = Truncator(self.text).words(EXCERPT_WORDS)
+
+    def save(self, *args, **kwargs):
+        self.fill_excerpt()
+        super().save(*args, **with_derived_field(kwargs, 'text', 'excerpt'))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Дата на момент загрузки нужна, чтобы перенести новость
+        # в другой месяц архива при её изменении.
+        instance._loaded_date = instance.__dict__.get('date')
+        return instance
+
+
+class ArchiveMonthQuerySet(models.QuerySet):
+
+    def shift(self, day, delta):
+        """Изменяет на delta число новостей за месяц, в который входит day."""
+        month, created = self.get_or_create(
+            year=day.year,
+            month=day.month,
+            defaults={'news_count': max(delta, 0)}
+        )
+        if not created:
+            self.filter(pk=month.pk).update(
+                news_count=F('news_count') + delta
+            )
+
+    def rebuild(self):
+        """Заново считает новости за каждый месяц."""
+        counts = News.objects.order_by().annotate(
+            year=ExtractYear('date'),
+            month=ExtractMonth('date'),
+        ).values('year', 'month').annotate(news_count=Count('pk'))
+        with transaction.atomic():
+            self.all().delete()
+            created = self.bulk_create(
+                ArchiveMonth(**row) for row in counts
+            )
+        bump_versions_on_commit(LIST_SCOPE, using=self.db)
+        return len(created)
+
+
+class ArchiveMonth(models.Model):
+    """Заранее посчитанное число новостей за месяц."""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    news_count = models.PositiveIntegerField(default=0)
+
+    objects = ArchiveMonthQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-year', '-month')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('year', 'month'),
+                name='unique_archive_month'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.month:02}.{self.year}'
+
+    @property
+    def first_day(self):
+        return date(self.year, self.month, 1)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create не отправляет сигналы,
+        поэтому счётчики комментариев пересчитываем сами.
+        """
+        objs = list(objs)
+        for comment in objs:
+            comment.fill_text_html()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        news_ids = {comment.news_id for comment in objs}
+        News.objects.filter(pk__in=news_ids).update_comment_count()
+        bump_versions_on_commit(
+            *map(detail_scope, news_ids), using=self.db
+        )
+        return objs
+
+    def for_thread(self):
+        """
+        Столбцы для списка комментариев.
+
+        От автора нужно только имя, текст берём уже отрисованный.
+        """
+        return self.select_related('author').only(
+            'created', 'text_html', 'author__username'
+        )
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +188,41 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        help_text='Текст, готовый к выводу: экранирован, с <br>'
+    )
     created = models.DateTimeField(auto_now_add=True)
+    flagged = models.BooleanField(
+        'Нарушает правила',
+        default=False,
+        help_text='Выставляется командой remoderate_comments'
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'),
+                name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='comment_author_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def fill_text_html(self):
+        self.text_html = linebreaksbr(self.text, autoescape=True)
+
+    def save(self, *args, **kwargs):
+        self.fill_text_html()
+        super().save(
+            *args, **with_derived_field(kwargs, 'text', 'text_html')
+        )
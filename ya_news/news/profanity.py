@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+# Латинские буквы и цифры, которыми подменяют похожие русские.
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'u': 'и', 'ё': 'е',
+    '0': 'о', '3': 'з', '6': 'б',
+})
+
+
+def normalize(text):
+    return text.lower().translate(LOOKALIKES)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class Automaton:
+    """
+    Автомат Ахо — Корасик по словарю запрещённых слов.
+
+    Текст просматривается за один проход, время проверки не зависит
+    от размера словаря. Совпадением считается только целое слово.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.lengths = [()]
+        for word in words:
+            self._add(normalize(word.strip()))
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.fail.append(0)
+                self.lengths.append(())
+            state = next_state
+        self.lengths[state] += (len(word),)
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.transitions[fail].get(char, 0)
+                self.lengths[next_state] += self.lengths[
+                    self.fail[next_state]
+                ]
+
+    def search(self, text):
+        """Возвращает первое найденное слово или None."""
+        text = normalize(text)
+        transitions, fail, lengths = self.transitions, self.fail, self.lengths
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for length in lengths[state]:
+                start = end - length + 1
+                if (
+                    (start == 0 or not _is_word_char(text[start - 1]))
+                    and (
+                        end + 1 == len(text)
+                        or not _is_word_char(text[end + 1])
+                    )
+                ):
+                    return text[start:end + 1]
+        return None
+
+
+def read_words(path):
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+class DictionaryMatcher:
+    """
+    Проверка текста по словарю из файла BAD_WORDS_FILE.
+
+    Файл перечитывается, как только меняется, без перезапуска
+    процессов; без файла используется встроенный словарь.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = default_words
+        self._lock = threading.Lock()
+        self._path = None
+        self._signature = None
+        self._checked = 0
+        self._automaton = Automaton(default_words)
+
+    def _file_signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def _reload_if_changed(self):
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        interval = getattr(settings, 'BAD_WORDS_RELOAD_INTERVAL', 1)
+        now = time.monotonic()
+        if path == self._path and now - self._checked < interval:
+            return
+        self._path = path
+        self._checked = now
+        signature = self._file_signature(path) if path else None
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            words = read_words(path) if signature else self.default_words
+            self._automaton = Automaton(words)
+            self._signature = signature
+
+    def search(self, text):
+        self._reload_if_changed()
+        return self._automaton.search(text)
@@ -4,9 +4,16 @@ from django.conf import settings
 from django.test.client import Client
 
 import pytest
+from news.cache import get_cache
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def clear_page_cache():
+    """Откат транзакции в тестах не отправляет сигналы."""
+    get_cache().clear()
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
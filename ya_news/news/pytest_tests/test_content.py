@@ -1,10 +1,15 @@
+from datetime import date
 from http import HTTPStatus
 
 from django.conf import settings
+from django.test import AsyncClient, Client
 from django.urls import reverse
 
 import pytest
+from asgiref.sync import async_to_sync
+from news.cache import LIST_SCOPE, detail_scope, get_stats, get_versions
 from news.forms import CommentForm
+from news.models import ArchiveMonth, Comment, News
 
 
 @pytest.mark.django_db
@@ -41,3 +46,411 @@ def test_authorized_client_has_form(client, author_client, id_for_args):
     assert response.status_code == HTTPStatus.OK
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_home_page_comment_count(client, django_assert_num_queries, news):
+    with django_assert_num_queries(1):
+        response = client.get(reverse('news:home'))
+    assert response.context['object_list'][0].comment_count == 10
+    assert 'Комментариев: 10' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(client, django_assert_num_queries, news):
+    for url in (reverse('news:home'), reverse('news:detail', args=(news.id,))):
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content
+    assert get_stats() == {'hits': 2, 'misses': 2}
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidated_by_comment(
+    client, news, author, django_capture_on_commit_callbacks
+):
+    url = reverse('news:detail', args=(news.id,))
+    client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Свежий')
+    assert 'Свежий' in client.get(url).content.decode()
+    response = client.get(reverse('news:home'))
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_page_versions_bumped_after_commit(
+    news, author, django_capture_on_commit_callbacks
+):
+    versions = get_versions(LIST_SCOPE, detail_scope(news.id))
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Свежий')
+        # До коммита страницы собираются из старых данных.
+        assert get_versions(LIST_SCOPE, detail_scope(news.id)) == versions
+    assert get_versions(LIST_SCOPE, detail_scope(news.id)) != versions
+
+
+@pytest.mark.django_db
+def test_authorized_pages_are_not_cached(author_client, id_for_args):
+    url = reverse('news:detail', args=(id_for_args))
+    author_client.get(url)
+    author_client.get(url)
+    assert get_stats() == {'hits': 0, 'misses': 0}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('count_date_news')
+def test_home_page_cursor_pagination(client):
+    url = reverse('news:home')
+    first_page = client.get(url).context['page_obj']
+    assert first_page.has_next
+
+    response = client.get(url, {'cursor': first_page.next_cursor})
+    assert response.status_code == HTTPStatus.OK
+    second_page = response.context['object_list']
+    assert len(second_page) == 1
+    assert second_page[0].date < first_page.object_list[-1].date
+    assert not response.context['page_obj'].has_next
+
+
+@pytest.mark.django_db
+def test_bad_cursor(client):
+    response = client.get(reverse('news:home'), {'cursor': 'мусор'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_archive_uses_precomputed_counts(client):
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=day)
+        for index, day in enumerate((
+            date(2022, 10, 1), date(2022, 10, 31), date(2022, 11, 1)
+        ))
+    )
+    assert ArchiveMonth.objects.get(year=2022, month=10).news_count == 2
+    response = client.get(reverse('news:archive'))
+    assert len(response.context['object_list']) == 2
+
+    response = client.get(reverse('news:archive_month', args=(2022, 10)))
+    assert response.context['news_count'] == 2
+    assert len(response.context['object_list']) == 2
+
+    response = client.get(reverse('news:archive_year', args=(2022,)))
+    assert response.context['news_count'] == 3
+
+    response = client.get(reverse('news:archive_month', args=(2022, 13)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_detail_shows_first_comments_page(client, settings, id_for_args):
+    settings.COMMENTS_COUNT_ON_PAGE = 4
+    response = client.get(reverse('news:detail', args=(id_for_args)))
+    comments = response.context['comments']
+    assert len(comments) == 4
+    assert comments.has_next
+    created = [comment.created for comment in comments]
+    assert created == sorted(created)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_comment_pages_endpoint(client, settings, id_for_args):
+    settings.COMMENTS_COUNT_ON_PAGE = 4
+    url = reverse('news:comments', args=(id_for_args))
+    cursor = client.get(reverse(
+        'news:detail', args=(id_for_args)
+    )).context['comments'].next_cursor
+    seen = []
+    while cursor is not None:
+        response = client.get(url, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.OK
+        page = response.context['comments']
+        seen.extend(comment.text for comment in page)
+        cursor = page.next_cursor
+    assert seen == [f'Tекст {index}' for index in range(4, 10)]
+
+
+@pytest.mark.django_db
+def test_comment_pages_endpoint_for_missing_news(client):
+    response = client.get(reverse('news:comments', args=(1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('id_for_args')),
+    ),
+)
+def test_conditional_get(
+    client, django_assert_num_queries, django_capture_on_commit_callbacks,
+    comment, author, name, args
+):
+    url = reverse(name, args=args)
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(
+            news=comment.news, author=author, text='Новый'
+        )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_conditional_get_after_comment_edit(
+    client, comment, django_capture_on_commit_callbacks
+):
+    url = reverse('news:detail', args=(comment.news_id,))
+    response = client.get(url)
+    assert 'Last-Modified' not in response
+    comment.text = 'Исправленный текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_conditional_get_any_etag(client, news):
+    url = reverse('news:detail', args=(news.id,))
+    response = client.get(url, HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    url = reverse('news:detail', args=(news.id + 1,))
+    response = client.get(url, HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_user(client, author_client, id_for_args):
+    url = reverse('news:detail', args=(id_for_args))
+    etag = client.get(url)['ETag']
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_session(author, id_for_args):
+    url = reverse('news:detail', args=(id_for_args))
+    first, second = Client(), Client()
+    first.force_login(author)
+    second.force_login(author)
+    etag = first.get(url)['ETag']
+    response = second.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views(author, comment):
+    async_client = AsyncClient()
+
+    @async_to_sync
+    async def get(url):
+        return await async_client.get(url)
+
+    response = get(reverse('news:home_async'))
+    assert response.status_code == HTTPStatus.OK
+    assert comment.news.title in response.content.decode()
+
+    url = reverse('news:detail_async', args=(comment.news_id,))
+    response = get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
+    assert 'Редактировать' not in response.content.decode()
+
+    async_client.force_login(author)
+    response = get(url)
+    assert 'Редактировать' in response.content.decode()
+
+    response = get(reverse('news:detail_async', args=(comment.news_id + 1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(client):
+    in_text = News.objects.create(
+        title='Погода', text='Свежие новости о <погоде> и ёлках'
+    )
+    in_title = News.objects.create(title='Новости города', text='Текст')
+    News.objects.create(title='Спорт', text='Матч')
+    response = client.get(reverse('news:search'), {'q': 'новостями'})
+    assert response.status_code == HTTPStatus.OK
+    object_list = response.context['object_list']
+    # Совпадение в заголовке весит больше.
+    assert object_list == [in_title, in_text]
+    assert object_list[1].snippet == (
+        'Свежие <mark>новости</mark> о &lt;погоде&gt; и ёлках'
+    )
+    response = client.get(reverse('news:search'), {'q': 'елки новость'})
+    assert response.context['object_list'] == [in_text]
+
+
+@pytest.mark.django_db
+def test_search_pages(client, settings):
+    settings.NEWS_COUNT_ON_HOME_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст') for index in range(3)
+    )
+    url = reverse('news:search')
+    response = client.get(url, {'q': 'новость'})
+    assert len(response.context['object_list']) == 2
+    assert response.context['has_next']
+    response = client.get(url, {'q': 'новость', 'page': 2})
+    assert len(response.context['object_list']) == 1
+    assert not response.context['has_next']
+    assert client.get(url, {'q': 'новость', 'page': 0}).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+@pytest.mark.django_db
+def test_comment_fragment_shared_between_users(
+    author_client, not_author_client, django_assert_num_queries, comment
+):
+    url = reverse('news:detail', args=(comment.news_id,))
+    edit_url = reverse('news:edit', args=(comment.pk,))
+    assert edit_url in author_client.get(url).content.decode()
+    # Сессия, пользователь и новость; комментарии — из общего фрагмента.
+    with django_assert_num_queries(3):
+        response = not_author_client.get(url)
+    content = response.content.decode()
+    assert comment.text in content
+    assert edit_url not in content
+    assert 'comment-actions' not in content
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_have_no_action_marks(client, settings, comment):
+    settings.COMMENTS_COUNT_ON_PAGE = 1
+    for url in (
+        reverse('news:detail', args=(comment.news_id,)),
+        reverse('news:comments', args=(comment.news_id,)),
+    ):
+        content = client.get(url).content.decode()
+        assert comment.text in content
+        assert 'comment-actions:' not in content
+
+
+@pytest.mark.django_db
+def test_comment_fragment_invalidated(
+    author_client, comment, django_capture_on_commit_callbacks
+):
+    url = reverse('news:detail', args=(comment.news_id,))
+    author_client.get(url)
+    comment.text = 'Исправленный текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    assert 'Исправленный текст' in author_client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_comment_pages_have_author_actions(
+    author_client, not_author_client, settings, id_for_args
+):
+    settings.COMMENTS_COUNT_ON_PAGE = 4
+    cursor = author_client.get(reverse(
+        'news:detail', args=(id_for_args)
+    )).context['comments'].next_cursor
+    url = reverse('news:comments', args=(id_for_args))
+    content = author_client.get(url, {'cursor': cursor}).content.decode()
+    assert content.count('Редактировать') == 4
+    content = not_author_client.get(url, {'cursor': cursor}).content.decode()
+    assert 'Редактировать' not in content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_list_and_thread_load_only_rendered_columns(
+    client, settings, id_for_args
+):
+    settings.COMMENTS_COUNT_ON_PAGE = 4
+    news = client.get(reverse('news:home')).context['object_list'][0]
+    assert 'text' in news.get_deferred_fields()
+    comment = client.get(
+        reverse('news:detail', args=(id_for_args))
+    ).context['comments'].object_list[0]
+    assert {'text', 'news_id'} <= comment.get_deferred_fields()
+    assert {'password', 'email'} <= comment.author.get_deferred_fields()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('count_date_news')
+def test_api_news_list_follows_cursor(client):
+    response = client.get(reverse('news:api_list'))
+    assert response['Content-Type'] == 'application/json'
+    first = response.json()
+    assert len(first['results']) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert set(first['results'][0]) == {
+        'id', 'title', 'date', 'excerpt', 'comment_count'
+    }
+    second = client.get(first['next']).json()
+    assert second['next'] is None
+    dates = [news['date'] for news in first['results'] + second['results']]
+    assert dates == sorted(dates, reverse=True)
+    assert len(dates) == News.objects.count()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('count_date_news')
+def test_api_sparse_fields(client):
+    url = reverse('news:api_list')
+    results = client.get(url, {'fields': 'title'}).json()['results']
+    assert set(results[0]) == {'id', 'date', 'title'}
+    response = client.get(url, {'fields': 'title,secret'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'secret' in response.json()['error']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:api_list', 'news:api_comments'))
+def test_api_bad_cursor(client, news, name):
+    args = (news.id,) if name == 'news:api_comments' else None
+    for cursor in ('!!!', 'WzFd'):
+        response = client.get(reverse(name, args=args), {'cursor': cursor})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'error': 'Некорректный курсор.'}
+
+
+@pytest.mark.django_db
+def test_api_news_detail(client, news):
+    news.refresh_from_db()
+    response = client.get(reverse('news:api_detail', args=(news.id,)))
+    assert response.json() == {
+        'id': news.id,
+        'title': news.title,
+        'date': news.date.isoformat(),
+        'text': news.text,
+        'comment_count': 0,
+    }
+    response = client.get(reverse('news:api_detail', args=(news.id + 1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'error': 'Новость не найдена.'}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_api_comments(client, news, author):
+    url = reverse('news:api_comments', args=(news.id,))
+    data = client.get(url, {'fields': 'author,text'}).json()
+    assert data['next'] is None
+    assert [comment['text'] for comment in data['results']] == list(
+        Comment.objects.order_by('created', 'id').values_list(
+            'text', flat=True
+        )
+    )
+    assert {comment['author'] for comment in data['results']} == {
+        author.username
+    }
+    response = client.get(reverse('news:api_comments', args=(news.id + 1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
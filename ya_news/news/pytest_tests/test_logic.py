@@ -1,12 +1,23 @@
+import json
 import random
 from http import HTTPStatus
+from io import StringIO
 
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
 from django.urls import reverse
 
 import pytest
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.cache import LIST_SCOPE, detail_scope, get_versions
+from news.forms import BAD_WORDS, WARNING, has_bad_words
+from news.management.commands import import_news
+from news.models import ArchiveMonth, Comment, News
+from news.search import search_news
 from pytest_django.asserts import assertFormError, assertRedirects
+from yanews.routers import (
+    PIN_COOKIE, PrimaryPinMiddleware, PrimaryReplicaRouter, is_pinned
+)
 
 
 @pytest.mark.django_db
@@ -123,3 +134,326 @@ def test_anonymous_and_user_cant_edit_comment_of_another_user(
     assert response.status_code == expected_status
     comment.refresh_from_db()
     assert comment.text == comment.text
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+    author_client,
+    form_data,
+    news,
+    id_for_args
+):
+    url = reverse('news:detail', args=(id_for_args))
+    author_client.post(url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+    comment = Comment.objects.get()
+    author_client.delete(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_after_bulk_create(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(5)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 5
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('list_comments')
+def test_recount_comments_command(news):
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+@pytest.mark.django_db
+def test_archive_follows_news_date(news):
+    month = ArchiveMonth.objects.get()
+    assert month.news_count == 1
+
+    news.date = news.date.replace(year=news.date.year - 1)
+    news.save()
+    assert ArchiveMonth.objects.get(pk=month.pk).news_count == 0
+    assert ArchiveMonth.objects.get(year=news.date.year).news_count == 1
+
+    news.delete()
+    assert not ArchiveMonth.objects.filter(news_count__gt=0).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('count_date_news')
+def test_rebuild_news_archive_command():
+    ArchiveMonth.objects.all().delete()
+    call_command('rebuild_news_archive', stdout=StringIO())
+    total = sum(ArchiveMonth.objects.values_list('news_count', flat=True))
+    assert total == News.objects.count()
+
+
+@pytest.mark.parametrize(
+    'text, is_bad',
+    (
+        ('Ну ты и редиска!', True),
+        ('Ну ты и PEДИСKA!', True),
+        ('Ну ты и peдиcкa!', True),
+        ('Салат из редисками не бывает', False),
+        ('Негодяйство какое-то', False),
+        ('Просто текст', False),
+    )
+)
+def test_bad_words_matcher(text, is_bad):
+    assert has_bad_words(text) is is_bad
+
+
+@pytest.mark.django_db
+def test_bad_words_file_is_reloaded(
+    author_client, id_for_args, settings, tmp_path
+):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь модераторов\nзлодей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    settings.BAD_WORDS_RELOAD_INTERVAL = 0
+    url = reverse('news:detail', args=(id_for_args))
+
+    response = author_client.post(url, data={'text': 'Ах ты злодей'})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+
+    words_file.write_text('негодник\n', encoding='utf-8')
+    response = author_client.post(url, data={'text': 'Ах ты злодей'})
+    assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(url, data={'text': 'Ах ты негодник'})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('workers', (0, 2))
+def test_remoderate_comments(news, author, tmp_path, workers):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for text in ('Хороший', f'Ты {BAD_WORDS[0]}', 'Тоже хороший')
+    )
+    Comment.objects.filter(text='Хороший').update(flagged=True)
+    checkpoint = tmp_path / 'checkpoint.json'
+    call_command(
+        'remoderate_comments',
+        chunk_size=2,
+        workers=workers,
+        checkpoint=str(checkpoint),
+        stdout=StringIO()
+    )
+    flagged = Comment.objects.filter(flagged=True)
+    assert list(flagged.values_list('text', flat=True)) == [
+        f'Ты {BAD_WORDS[0]}'
+    ]
+    last_pk = Comment.objects.order_by('pk').last().pk
+    assert checkpoint.read_text() == f'{{"last_pk": {last_pk}}}'
+
+
+@pytest.mark.django_db
+def test_remoderate_comments_resume(comment, tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+    checkpoint.write_text(f'{{"last_pk": {comment.pk}}}')
+    Comment.objects.update(text=BAD_WORDS[0])
+    out = StringIO()
+    call_command(
+        'remoderate_comments',
+        workers=0,
+        checkpoint=str(checkpoint),
+        resume=True,
+        stdout=out
+    )
+    assert 'Проверено комментариев: 0' in out.getvalue()
+    assert not Comment.objects.filter(flagged=True).exists()
+
+
+@pytest.mark.django_db
+def test_remoderate_comments_resume_requires_checkpoint():
+    with pytest.raises(CommandError):
+        call_command('remoderate_comments', workers=0, resume=True)
+
+
+@pytest.mark.django_db
+def test_import_news_fixture():
+    fixture = settings.BASE_DIR / 'news' / 'fixtures' / 'news.json'
+    call_command(
+        'import_news', str(fixture), batch_size=2, stdout=StringIO()
+    )
+    assert News.objects.count() == len(json.loads(fixture.read_text()))
+    assert ArchiveMonth.objects.filter(news_count__gt=0).exists()
+
+
+@pytest.mark.django_db
+def test_import_news_ndjson(author, tmp_path):
+    feed = tmp_path / 'feed.ndjson'
+    records = [
+        {'model': 'news.news', 'pk': 7, 'fields': {
+            'title': 'Новость', 'text': 'Текст', 'date': '2022-11-01'
+        }},
+        *(
+            {'model': 'news.comment', 'fields': {
+                'news': 7, 'author': author.pk, 'text': f'Текст {index}'
+            }}
+            for index in range(3)
+        ),
+    ]
+    feed.write_text(
+        '\n'.join(json.dumps(record) for record in records),
+        encoding='utf-8'
+    )
+    call_command('import_news', str(feed), batch_size=2, stdout=StringIO())
+    assert News.objects.get(pk=7).comment_count == 3
+
+
+@pytest.mark.django_db
+def test_import_news_existing_pk(tmp_path):
+    News.objects.create(pk=7, title='Новость', text='Текст')
+    feed = tmp_path / 'feed.ndjson'
+    feed.write_text('\n'.join(
+        json.dumps({'model': 'news.news', 'pk': pk, 'fields': {
+            'title': f'Новость {pk}', 'text': 'Текст'
+        }})
+        for pk in (5, 6, 7, 8)
+    ), encoding='utf-8')
+    with pytest.raises(CommandError, match='Пачка 2 .* Загружено до неё: 2'):
+        call_command(
+            'import_news', str(feed), batch_size=2, stdout=StringIO()
+        )
+    assert sorted(News.objects.values_list('pk', flat=True)) == [5, 6, 7]
+
+
+def test_iter_json_array_across_reads(monkeypatch):
+    monkeypatch.setattr(import_news, 'READ_SIZE', 7)
+    records = [{'title': f'Новость {index}'} for index in range(20)]
+    text = ' [ ' + ' , '.join(json.dumps(record) for record in records)
+    assert list(import_news.iter_json_array(StringIO(text + ' ]'))) == (
+        records
+    )
+    with pytest.raises(CommandError):
+        list(import_news.iter_json_array(StringIO(text)))
+
+
+def test_router_reads_from_replica_until_write(rf, settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+    def view(request):
+        assert News.objects.all().db == 'replica'
+        assert News.objects.select_for_update().db == 'default'
+        # После записи запрос читает из основной базы.
+        assert News.objects.all().db == 'default'
+        return HttpResponse()
+
+    PrimaryPinMiddleware(view)(rf.get('/'))
+
+
+def test_router_does_not_pin_outside_request(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    assert News.objects.select_for_update().db == 'default'
+    assert not is_pinned()
+    assert News.objects.all().db == 'replica'
+
+
+def test_pin_middleware_sets_cookie_after_write(rf, settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    router = PrimaryReplicaRouter()
+
+    def write(request):
+        assert router.db_for_read(News) == 'replica'
+        router.db_for_write(News)
+        return HttpResponse()
+
+    def read(request):
+        assert router.db_for_read(News) == 'default'
+        return HttpResponse()
+
+    response = PrimaryPinMiddleware(write)(rf.get('/'))
+    assert PIN_COOKIE in response.cookies
+    assert not is_pinned()
+    rf.cookies[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    response = PrimaryPinMiddleware(read)(rf.get('/'))
+    assert not is_pinned()
+    # Чтение не продлевает привязку: cookie истечёт в свой срок.
+    assert PIN_COOKIE not in response.cookies
+
+
+@pytest.mark.django_db
+def test_search_index_follows_news(news):
+    assert search_news(news.title, 10) == [news]
+    news.title = 'Обновлённая новость'
+    news.save()
+    assert search_news('заголовок', 10) == []
+    assert search_news('обновленный', 10) == [news]
+    news.delete()
+    assert search_news('обновленный', 10) == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(news):
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Сводка') for index in range(5)
+    )
+    out = StringIO()
+    call_command('rebuild_search_index', batch_size=2, stdout=out)
+    assert 'новостей: 6' in out.getvalue()
+    assert len(search_news('сводка', 10)) == 5
+    assert search_news(news.title, 10) == [news]
+
+
+@pytest.mark.django_db
+def test_rendered_text_updated_on_save(author_client, author, news):
+    news.text = ' '.join(f'слово{index}' for index in range(20))
+    news.save(update_fields=('text',))
+    news.refresh_from_db()
+    assert news.excerpt == (
+        ' '.join(f'слово{index}' for index in range(15)) + '…'
+    )
+    comment = Comment.objects.create(news=news, author=author, text='a<b>')
+    assert comment.text_html == 'a&lt;b&gt;'
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)),
+        data={'text': 'Первая строка\nвторая'}
+    )
+    comment.refresh_from_db()
+    assert comment.text_html == 'Первая строка<br>вторая'
+
+
+@pytest.mark.django_db
+def test_rendered_text_bulk_and_backfill(author, news):
+    Comment.objects.bulk_create(
+        [Comment(news=news, author=author, text='a\nb')]
+    )
+    assert Comment.objects.get().text_html == 'a<br>b'
+    News.objects.update(text='Изменено в обход save')
+    Comment.objects.update(text='<i>')
+    scopes = (LIST_SCOPE, detail_scope(news.id))
+    versions = get_versions(*scopes)
+    call_command('backfill_rendered_text', batch_size=1, stdout=StringIO())
+    assert News.objects.get().excerpt == 'Изменено в обход save'
+    assert Comment.objects.get().text_html == '&lt;i&gt;'
+    assert get_versions(*scopes) != versions
+
+
+# Модули, скопированные в ya_note: у проектов нет общего пакета.
+SHARED_MODULES = (
+    ('news/queries.py', 'notes/queries.py'),
+    ('news/pagination.py', 'notes/pagination.py'),
+    ('yanews/routers.py', 'yanote/routers.py'),
+    ('yanews/sqlite/base.py', 'yanote/sqlite/base.py'),
+    (
+        'news/management/commands/sync_replica.py',
+        'notes/management/commands/sync_replica.py',
+    ),
+)
+
+
+@pytest.mark.parametrize('news_path, note_path', SHARED_MODULES)
+def test_shared_module_copies_match(news_path, note_path):
+    ya_note = settings.BASE_DIR.parent / 'ya_note'
+    assert (settings.BASE_DIR / news_path).read_text(encoding='utf-8') == (
+        (ya_note / note_path).read_text(encoding='utf-8')
+    )
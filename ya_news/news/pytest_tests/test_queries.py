@@ -0,0 +1,174 @@
+import sqlite3
+from datetime import date, datetime
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from news.models import Comment, News
+from news.pagination import cursor_condition
+from news.queries import QueryBudgetExceeded
+from news.views import NewsDetail
+from yanews.sqlite.base import immediate_atomic
+
+NEWS_PAGE = ('-date', '-id')
+COMMENTS_PAGE = ('created', 'id')
+CREATED = timezone.make_aware(datetime(2022, 10, 1))
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса проверяем в SQLite'
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'queryset',
+    (
+        News.objects.order_by(*NEWS_PAGE)[:10],
+        News.objects.filter(
+            cursor_condition(NEWS_PAGE, (date(2022, 10, 1), 15))
+        ).order_by(*NEWS_PAGE)[:10],
+        News.objects.filter(
+            date__gte=date(2022, 10, 1), date__lt=date(2022, 11, 1)
+        ).order_by(*NEWS_PAGE)[:10],
+        Comment.objects.filter(news_id=1).order_by(*COMMENTS_PAGE)[:50],
+        Comment.objects.filter(news_id=1).filter(
+            cursor_condition(COMMENTS_PAGE, (CREATED, 7))
+        ).order_by(*COMMENTS_PAGE)[:50],
+        Comment.objects.filter(author_id=1),
+    ),
+    ids=(
+        'news-page',
+        'news-next-page',
+        'news-archive-month',
+        'comments-page',
+        'comments-next-page',
+        'author-comments',
+    )
+)
+def test_hot_queries_use_indexes(queryset):
+    plan = query_plan(queryset)
+    for step in plan:
+        assert 'TEMP B-TREE' not in step, plan
+        assert not (step.startswith('SCAN') and 'USING' not in step), plan
+
+
+@pytest.fixture
+def strict_query_budget(settings):
+    settings.QUERY_BUDGET_ENABLED = True
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('strict_query_budget', 'list_comments')
+@pytest.mark.parametrize(
+    'parametrized_client, method, name, args, data, expected_count',
+    (
+        (pytest.lazy_fixture('client'), 'get', 'news:home', None, None, 1),
+        (
+            pytest.lazy_fixture('author_client'), 'get', 'news:detail',
+            pytest.lazy_fixture('id_for_args'), None, 2
+        ),
+        (
+            pytest.lazy_fixture('author_client'), 'post', 'news:detail',
+            pytest.lazy_fixture('id_for_args'),
+            pytest.lazy_fixture('form_data'), 3
+        ),
+        (
+            pytest.lazy_fixture('client'), 'get', 'news:comments',
+            pytest.lazy_fixture('id_for_args'), None, 1
+        ),
+        (pytest.lazy_fixture('client'), 'get', 'news:archive', None, None, 1),
+        (pytest.lazy_fixture('client'), 'get', 'news:api_list', None, None, 1),
+        (
+            pytest.lazy_fixture('client'), 'get', 'news:api_detail',
+            pytest.lazy_fixture('id_for_args'), None, 1
+        ),
+        (
+            pytest.lazy_fixture('client'), 'get', 'news:api_comments',
+            pytest.lazy_fixture('id_for_args'), None, 1
+        ),
+        (
+            pytest.lazy_fixture('client'), 'get', 'news:search', None,
+            {'q': 'заголовок'}, 1
+        ),
+        (
+            pytest.lazy_fixture('author_client'), 'get', 'news:edit',
+            pytest.lazy_fixture('comment_for_args'), None, 1
+        ),
+        (
+            pytest.lazy_fixture('author_client'), 'post', 'news:edit',
+            pytest.lazy_fixture('comment_for_args'),
+            pytest.lazy_fixture('form_data_new'), 2
+        ),
+        (
+            pytest.lazy_fixture('author_client'), 'get', 'news:delete',
+            pytest.lazy_fixture('comment_for_args'), None, 1
+        ),
+        (
+            pytest.lazy_fixture('author_client'), 'delete', 'news:delete',
+            pytest.lazy_fixture('comment_for_args'), None, 3
+        ),
+    )
+)
+def test_views_query_budget(
+    parametrized_client, method, name, args, data, expected_count
+):
+    request = getattr(parametrized_client, method)
+    response = request(reverse(name, args=args), data=data)
+    assert response.wsgi_request.query_count == expected_count
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('strict_query_budget')
+def test_query_budget_exceeded(client, monkeypatch, news):
+    monkeypatch.setattr(NewsDetail, 'query_budget', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(reverse('news:detail', args=(news.id,)))
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='PRAGMA есть только в SQLite'
+)
+def test_sqlite_connection_pragmas(tmp_path, django_db_blocker):
+    db = connections[DEFAULT_DB_ALIAS].__class__(
+        {**connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')},
+        alias='pragmas'
+    )
+    expected = {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 2,
+    }
+    # Отдельная файловая база, а не тестовая: WAL в памяти недоступен.
+    with django_db_blocker.unblock():
+        with db.cursor() as cursor:
+            for pragma, value in expected.items():
+                cursor.execute(f'PRAGMA {pragma}')
+                assert cursor.fetchone()[0] == value, pragma
+        connections['pragmas'] = db
+        other = sqlite3.connect(db.settings_dict['NAME'], timeout=0)
+        try:
+            # Обычная транзакция отложенная: блокировки ещё нет.
+            with transaction.atomic(using='pragmas'):
+                db.cursor().execute('SELECT 1')
+                other.execute('BEGIN IMMEDIATE')
+                other.execute('ROLLBACK')
+            # immediate_atomic берёт блокировку на запись сразу.
+            with immediate_atomic('pragmas'):
+                with pytest.raises(sqlite3.OperationalError, match='locked'):
+                    other.execute('BEGIN IMMEDIATE')
+            assert db.get_autocommit()
+        finally:
+            other.close()
+            del connections['pragmas']
+        db.close()
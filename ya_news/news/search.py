@@ -0,0 +1,155 @@
+"""
+Полнотекстовый поиск по новостям: SQLite FTS5.
+
+Индекс news_search хранит только токены заголовка и текста, сами
+строки берутся из news_news (external content). Индекс обновляют
+триггеры, поэтому он не зависит от ORM и сигналов. Русская морфология
+сделана на стороне запроса: у слова отрезается окончание, и ищется
+префикс основы («новостями» → новост*).
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+SEARCH_TABLE = 'news_search'
+NEWS_TABLE = News._meta.db_table
+
+# unicode61 не сводит «ё» к «е»: делаем это сами при индексации.
+# Выражение детерминированное, поэтому триггеры удаления находят
+# те же токены, что были добавлены.
+_NORMALIZED = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values(alias):
+    return ', '.join((
+        f'{alias}.id',
+        _NORMALIZED.format(f'{alias}.title'),
+        _NORMALIZED.format(f'{alias}.text'),
+    ))
+
+
+# Заголовок и текст — в одном индексе; prefix ускоряет короткие
+# префиксные запросы.
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+    f"title, text, content='{NEWS_TABLE}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+TRIGGERS = (
+    f'CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON {NEWS_TABLE} '
+    f'BEGIN INSERT INTO {SEARCH_TABLE}(rowid, title, text) '
+    f'VALUES ({_values("new")}); END',
+    f'CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON {NEWS_TABLE} '
+    f'BEGIN INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text) '
+    f"VALUES ('delete', {_values('old')}); END",
+    f'CREATE TRIGGER {SEARCH_TABLE}_update '
+    f'AFTER UPDATE OF title, text ON {NEWS_TABLE} '
+    f'BEGIN INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text) '
+    f"VALUES ('delete', {_values('old')}); "
+    f'INSERT INTO {SEARCH_TABLE}(rowid, title, text) '
+    f'VALUES ({_values("new")}); END',
+)
+
+DROP_TRIGGERS = tuple(
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{name}'
+    for name in ('insert', 'delete', 'update')
+)
+
+CLEAR_INDEX = (
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('delete-all')"
+)
+
+INDEX_BATCH = (
+    f'INSERT INTO {SEARCH_TABLE}(rowid, title, text) '
+    f'SELECT {_values("n")} FROM {NEWS_TABLE} n '
+    'WHERE n.id > %s AND n.id <= %s'
+)
+
+BATCH_BOUNDS = (
+    f'SELECT id FROM {NEWS_TABLE} WHERE id > %s AND id <= %s '
+    'ORDER BY id LIMIT %s'
+)
+
+OPTIMIZE_INDEX = (
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+)
+
+# bm25 со своим весом для каждого столбца: совпадение в заголовке
+# важнее. Чем меньше значение, тем выше новость в выдаче.
+SEARCH = (
+    f'SELECT n.id, n.title, n.date, n.comment_count, '
+    f"snippet({SEARCH_TABLE}, -1, char(2), char(3), '…', 16) AS snippet "
+    f'FROM {SEARCH_TABLE} JOIN {NEWS_TABLE} n ON n.id = {SEARCH_TABLE}.rowid '
+    f'WHERE {SEARCH_TABLE} MATCH %s '
+    f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 1.0), n.id DESC '
+    'LIMIT %s OFFSET %s'
+)
+
+WORD = re.compile(r'\w+')
+MAX_TERMS = 8
+MIN_STEM = 3
+# Окончания существительных, прилагательных и глаголов; длинные
+# проверяются первыми.
+ENDINGS = sorted(
+    (
+        'иями', 'ями', 'ами', 'ией', 'иях', 'ием', 'ого', 'его', 'ому',
+        'ему', 'ыми', 'ими', 'ешь', 'ать', 'ять', 'ить', 'еть', 'ает',
+        'яет', 'ают', 'яют', 'ует', 'уют', 'ая', 'яя', 'ое', 'ее', 'ые',
+        'ие', 'ый', 'ий', 'ой', 'ей', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях',
+        'ов', 'ев', 'ию', 'ью', 'ия', 'ья', 'ть', 'ет', 'ут', 'ют', 'ит',
+        'ат', 'ят', 'им', 'ым', 'ую', 'юю', 'а', 'я', 'о', 'е', 'ы', 'и',
+        'у', 'ю', 'ь', 'й',
+    ),
+    key=len, reverse=True
+)
+
+
+def stem(word):
+    """Основа слова без окончания, не короче MIN_STEM букв."""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_query(text):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Все слова обязательны и ищутся по префиксу основы. Пустая строка —
+    нечего искать.
+    """
+    words = WORD.findall(text.lower().replace('ё', 'е'))[:MAX_TERMS]
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def highlight(snippet):
+    """Экранированный фрагмент, совпадения выделены <mark>."""
+    return mark_safe(
+        escape(snippet).replace('\x02', '<mark>').replace('\x03', '</mark>')
+    )
+
+
+def search_news(text, limit, offset=0):
+    """
+    Новости по убыванию релевантности, со сниппетом.
+
+    Возвращает список, а не QuerySet: ранжирование делает FTS5.
+    """
+    query = build_query(text)
+    if not query:
+        return []
+    if connection.vendor != 'sqlite':
+        # Без FTS5 ищем подстроку в заголовке, без сниппетов.
+        return list(
+            News.objects.filter(title__icontains=text)[offset:offset + limit]
+        )
+    results = list(News.objects.raw(SEARCH, (query, limit, offset)))
+    for news in results:
+        news.snippet = highlight(news.snippet)
+    return results
@@ -0,0 +1,69 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import LIST_SCOPE, bump_versions_on_commit, detail_scope
+from .models import ArchiveMonth, Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Новый комментарий увеличивает счётчик у новости."""
+    if created and not raw:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчик у новости."""
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=News)
+def update_archive_on_save(sender, instance, created, raw=False, **kwargs):
+    """Учитываем новость в архиве за её месяц."""
+    if raw:
+        return
+    loaded_date = getattr(instance, '_loaded_date', None)
+    if created:
+        ArchiveMonth.objects.shift(instance.date, 1)
+    elif loaded_date and (
+        (loaded_date.year, loaded_date.month)
+        != (instance.date.year, instance.date.month)
+    ):
+        ArchiveMonth.objects.shift(loaded_date, -1)
+        ArchiveMonth.objects.shift(instance.date, 1)
+    instance._loaded_date = instance.date
+
+
+@receiver(post_delete, sender=News)
+def update_archive_on_delete(sender, instance, **kwargs):
+    ArchiveMonth.objects.shift(instance.date, -1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, using, **kwargs):
+    bump_versions_on_commit(
+        LIST_SCOPE, detail_scope(instance.pk), using=using
+    )
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment_pages(sender, instance, created, using, **kwargs):
+    """Правка комментария меняет только страницу новости."""
+    scopes = [detail_scope(instance.news_id)]
+    if created:
+        scopes.append(LIST_SCOPE)
+    bump_versions_on_commit(*scopes, using=using)
+
+
+@receiver(post_delete, sender=Comment)
+def invalidate_deleted_comment_pages(sender, instance, using, **kwargs):
+    bump_versions_on_commit(
+        LIST_SCOPE, detail_scope(instance.news_id), using=using
+    )
@@ -1,12 +1,46 @@
 from django.urls import path
 
-from news import views
+from news import api, async_views, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path('async/', async_views.news_list, name='home_async'),
+    path(
+        'async/news/<int:pk>/',
+        async_views.news_detail,
+        name='detail_async'
+    ),
+    path('api/news/', api.NewsListApi.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.NewsCommentsApi.as_view(),
+        name='api_comments'
+    ),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/',
+        views.NewsArchivePeriod.as_view(),
+        name='archive_year'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.NewsArchivePeriod.as_view(),
+        name='archive_month'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
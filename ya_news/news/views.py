@@ -1,55 +1,231 @@
+from datetime import date
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Sum
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views import generic
 
+from .cache import (
+    AnonymousPageCacheMixin, ConditionalGetMixin, detail_scope
+)
 from .forms import CommentForm
-from .models import Comment, News
+from .fragments import (
+    COMMENTS_ORDERING, add_comment_actions, render_comments
+)
+from .models import ArchiveMonth, Comment, News
+from .pagination import KeysetPaginationMixin
+from .queries import QueryBudgetMixin
+from .search import search_news
 
 
-class NewsList(generic.ListView):
+class NewsList(
+        QueryBudgetMixin,
+        ConditionalGetMixin,
+        AnonymousPageCacheMixin,
+        KeysetPaginationMixin,
+        generic.ListView
+):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    keyset_ordering = ('-date', '-id')
+    query_budget = 1
 
     def get_queryset(self):
+        return super().get_queryset().for_list()
+
+    def get_paginate_by(self, queryset):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество на странице определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+class NewsArchive(
+        QueryBudgetMixin,
+        AnonymousPageCacheMixin,
+        generic.ListView
+):
+    """Архив: месяцы, за которые есть новости."""
+    model = ArchiveMonth
+    template_name = 'news/archive.html'
+    query_budget = 1
+
+    def get_queryset(self):
+        return self.model.objects.filter(news_count__gt=0)
+
+
+class NewsArchivePeriod(NewsList):
+    """Новости за год или за месяц."""
+    template_name = 'news/archive_period.html'
+    query_budget = 2
+
+    def get_period(self):
+        year = self.kwargs['year']
+        month = self.kwargs.get('month')
+        try:
+            if month is None:
+                return date(year, 1, 1), date(year + 1, 1, 1)
+            start = date(year, month, 1)
+        except ValueError:
+            raise Http404('Такого периода нет.')
+        if month == 12:
+            return start, date(year + 1, 1, 1)
+        return start, date(year, month + 1, 1)
+
+    def get_queryset(self):
+        start, end = self.get_period()
+        return super().get_queryset().filter(date__gte=start, date__lt=end)
+
+    def get_context_data(self, **kwargs):
+        """Число новостей берём из архива, а не считаем заново."""
+        context = super().get_context_data(**kwargs)
+        months = ArchiveMonth.objects.filter(year=self.kwargs['year'])
+        if 'month' in self.kwargs:
+            months = months.filter(month=self.kwargs['month'])
+        context['year'] = self.kwargs['year']
+        context['month'] = self.kwargs.get('month')
+        context['news_count'] = months.aggregate(
+            total=Sum('news_count')
+        )['total'] or 0
+        return context
+
+
+class NewsSearch(
+        QueryBudgetMixin,
+        AnonymousPageCacheMixin,
+        generic.TemplateView
+):
+    """Поиск по заголовкам и текстам, самые релевантные — первыми."""
+    template_name = 'news/search.html'
+    query_budget = 1
+
+    def get_page_number(self):
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Неверный номер страницы.')
+        if page < 1:
+            raise Http404('Неверный номер страницы.')
+        return page
+
+    def get_context_data(self, **kwargs):
+        """Одна лишняя запись показывает, есть ли следующая страница."""
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = self.get_page_number()
+        per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+        results = search_news(query, per_page + 1, (page - 1) * per_page)
+        context.update(
+            query=query,
+            object_list=results[:per_page],
+            page=page,
+            has_next=len(results) > per_page,
+        )
+        return context
+
+
+class CommentsPageMixin:
+    """Первая страница комментариев к новости self.object."""
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_html'] = render_comments(
+            self.object.pk, self.request.user
+        )
+        return context
 
-class NewsDetail(generic.DetailView):
+
+class NewsDetail(
+        QueryBudgetMixin,
+        ConditionalGetMixin,
+        AnonymousPageCacheMixin,
+        CommentsPageMixin,
+        generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
+    query_budget = 2
+
+    def get_cache_scopes(self):
+        return (detail_scope(self.kwargs['pk']),)
+
+    def object_exists(self):
+        return self.model.objects.filter(pk=self.kwargs['pk']).exists()
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """Вместе с новостью выводим только первую страницу комментариев."""
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(
+        QueryBudgetMixin,
+        AnonymousPageCacheMixin,
+        KeysetPaginationMixin,
+        generic.ListView
+):
+    """Следующие страницы комментариев к новости."""
+    model = Comment
+    template_name = 'news/comments.html'
+    keyset_ordering = COMMENTS_ORDERING
+    query_budget = 2
+
+    def get_cache_scopes(self):
+        return (detail_scope(self.kwargs['pk']),)
+
+    def get_paginate_by(self, queryset):
+        return settings.COMMENTS_COUNT_ON_PAGE
+
+    def get_queryset(self):
+        return self.model.objects.filter(
+            news_id=self.kwargs['pk']
+        ).for_thread()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not context['page_obj'] and not News.objects.filter(
+            pk=self.kwargs['pk']
+        ).exists():
+            raise Http404('Новость не найдена.')
+        context['comments'] = context['page_obj']
+        context['news_id'] = self.kwargs['pk']
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        user = self.request.user
+
+        def add_actions(response):
+            response.content = add_comment_actions(
+                response.content.decode(), user
+            )
+
+        response.add_post_render_callback(add_actions)
+        return response
+
+
 class NewsComment(
+        QueryBudgetMixin,
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
     form_class = CommentForm
     template_name = 'news/detail.html'
+    query_budget = 3
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -63,42 +239,47 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    """Показ новости и добавление комментария по одному адресу."""
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(QueryBudgetMixin, LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
     """Редактирование комментария."""
     template_name = 'news/edit.html'
     form_class = CommentForm
+    query_budget = {'get': 1, 'post': 2}
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+    query_budget = {'get': 1, 'post': 3, 'delete': 3}
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yanews.routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,11 +54,51 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с WAL, busy_timeout и другими PRAGMA: yanews/sqlite/base.py.
+        'ENGINE': 'yanews.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Соединение живёт между запросами и не открывается заново.
+        'CONN_MAX_AGE': 600,
+    },
+    # Копия default, которую обновляет manage.py sync_replica.
+    'replica': {
+        'ENGINE': 'yanews.sqlite',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'pragmas': {'query_only': 1}},
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+
+# Базы только для чтения. Чтобы читать с копии, запустите
+# sync_replica --interval 5 и добавьте сюда 'replica'.
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи читать из default: не меньше
+# интервала копирования реплики.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Для нескольких процессов нужен общий бэкенд (memcached, redis):
+# иначе сигналы сбрасывают кеш только в своём процессе.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-pages',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 3,
+        },
+    },
+}
+
+NEWS_PAGE_CACHE_ALIAS = 'pages'
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -79,4 +120,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
+# Бюджет SQL-запросов представлений (news.queries.QueryBudgetMixin).
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_STRICT = False
+
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+# Потоки для ORM и шаблонов в асинхронных представлениях.
+NEWS_ASYNC_THREADS = 8
+
+# Словарь запрещённых слов: по одному слову в строке.
+# Файл перечитывается при изменении не чаще раза в интервал (секунды).
+BAD_WORDS_FILE = None
+BAD_WORDS_RELOAD_INTERVAL = 1
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.template.loader import get_template
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # С кеширующим загрузчиком шаблон компилируется один раз.
+        for name in getattr(settings, 'TEMPLATE_PRELOAD', ()):
+            get_template(name)
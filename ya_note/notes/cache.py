@@ -0,0 +1,86 @@
+"""
+Кеш заметок по (автор, slug) для страниц одной заметки.
+
+Cache-aside: при промахе заметка читается из базы и кладётся в кеш,
+при сохранении и удалении сигналы после коммита удаляют её ключи —
+и новый, и прежний, если slug поменялся. Размер кеша ограничен
+MAX_ENTRIES, вытесняются давно не читанные заметки; TIMEOUT —
+страховка от копии, прочитанной до коммита и положенной после сброса.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+NOTE_KEY = 'notes:note:{author_id}:{slug}'
+STATS_KEY = 'notes:stats:{name}'
+
+
+def get_cache():
+    return caches[settings.NOTE_CACHE_ALIAS]
+
+
+def note_key(author_id, slug):
+    return NOTE_KEY.format(author_id=author_id, slug=slug)
+
+
+def get_note(author_id, slug, load):
+    """
+    Заметка автора из кеша.
+
+    load() вызывается только при промахе; Http404 из него пробрасывается,
+    а отсутствие заметки не кешируется.
+    """
+    cache = get_cache()
+    key = note_key(author_id, slug)
+    note = cache.get(key)
+    _count('misses' if note is None else 'hits')
+    if note is None:
+        note = load()
+        cache.set(key, note)
+    return note
+
+
+def forget_note(author_id, *slugs):
+    """Удаляет из кеша заметку под всеми её slug."""
+    get_cache().delete_many(
+        note_key(author_id, slug) for slug in set(slugs) if slug
+    )
+
+
+def _count(name):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша заметок."""
+    cache = get_cache()
+    names = ('hits', 'misses')
+    values = cache.get_many(STATS_KEY.format(name=name) for name in names)
+    return {
+        name: values.get(STATS_KEY.format(name=name), 0) for name in names
+    }
+
+
+class CachedNoteMixin:
+    """
+    Берёт заметку для GET-запроса из кеша.
+
+    Запись (POST, DELETE) всегда читает заметку из базы: форма должна
+    сохранять свежие данные.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None or self.request.method not in (
+            'GET', 'HEAD'
+        ):
+            return super().get_object(queryset)
+        return get_note(
+            self.request.user.pk,
+            self.kwargs[self.slug_url_kwarg],
+            lambda: super(CachedNoteMixin, self).get_object()
+        )
@@ -0,0 +1,153 @@
+"""
+Потоковая выгрузка заметок автора.
+
+Заметки читаются через iterator(chunk_size) и сразу отдаются кусками:
+в памяти одновременно не больше пачки строк и одного буфера, сколько
+бы заметок ни было. NDJSON — тот же формат, что читает импорт
+(notes.importer); zip собирается на лету, без перемотки потока.
+"""
+import json
+import struct
+import tempfile
+import time
+import zlib
+
+from .importer import FIELDS
+from .models import Note
+
+# Память на выгрузку — примерно CHUNK_SIZE заметок.
+CHUNK_SIZE = 200
+# Мелкие строки склеиваем, чтобы не писать в сокет по строке.
+BUFFER_SIZE = 64 * 1024
+
+# Оглавление zip больше этого размера уходит из памяти на диск.
+DIRECTORY_IN_MEMORY = 1024 * 1024
+LOCAL_HEADER = '<4s5H3L2H'
+CENTRAL_HEADER = '<4s6H3L5H2L'
+UTF8_NAMES = 0x0800
+DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'notes.ndjson'),
+    'zip': ('application/zip', 'notes.zip'),
+}
+
+
+def author_notes(author, using):
+    return Note.objects.using(using).filter(author=author).order_by(
+        'id'
+    ).only(*FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def ndjson_chunks(notes):
+    """Куски NDJSON по BUFFER_SIZE байт, по заметке на строке."""
+    buffer = []
+    size = 0
+    for note in notes:
+        line = json.dumps(
+            {field: getattr(note, field) for field in FIELDS},
+            ensure_ascii=False
+        ).encode() + b'\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def markdown(note):
+    return f'# {note.title}\n\n{note.text}\n'
+
+
+def _dos_datetime(moment):
+    return (
+        moment.tm_hour << 11 | moment.tm_min << 5 | moment.tm_sec // 2,
+        (moment.tm_year - 1980) << 9 | moment.tm_mon << 5 | moment.tm_mday,
+    )
+
+
+def zip_chunks(notes):
+    """
+    Zip-архив с заметками в Markdown, по файлу {slug}.md на заметку.
+
+    zipfile держит в памяти запись о каждом файле до конца архива,
+    поэтому архив пишем сами: заметка сжимается целиком, её размеры
+    и CRC известны до заголовка, а оглавление копится во временном
+    файле и дописывается в конце. Больше 65535 файлов — ZIP64.
+    """
+    dos_time, dos_date = _dos_datetime(time.localtime())
+    directory = tempfile.SpooledTemporaryFile(max_size=DIRECTORY_IN_MEMORY)
+    buffer = []
+    offset = size = entries = 0
+    for note in notes:
+        name = f'{note.slug}.md'.encode()
+        data = markdown(note).encode()
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        crc = zlib.crc32(data)
+        header = struct.pack(
+            LOCAL_HEADER, b'PK\x03\x04', 20, UTF8_NAMES, DEFLATED,
+            dos_time, dos_date, crc, len(compressed), len(data),
+            len(name), 0
+        )
+        extra = b''
+        if offset >= ZIP64_LIMIT:
+            extra = struct.pack('<2HQ', 1, 8, offset)
+        directory.write(struct.pack(
+            CENTRAL_HEADER, b'PK\x01\x02', 45, 45, UTF8_NAMES, DEFLATED,
+            dos_time, dos_date, crc, len(compressed), len(data),
+            len(name), len(extra), 0, 0, 0, 0, min(offset, ZIP64_LIMIT)
+        ) + name + extra)
+        buffer += (header, name, compressed)
+        offset += len(header) + len(name) + len(compressed)
+        size += len(header) + len(name) + len(compressed)
+        entries += 1
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    yield b''.join(buffer)
+    directory_size = directory.tell()
+    directory.seek(0)
+    while True:
+        chunk = directory.read(BUFFER_SIZE)
+        if not chunk:
+            break
+        yield chunk
+    directory.close()
+    yield _end_records(entries, directory_size, offset)
+
+
+def _end_records(entries, directory_size, directory_offset):
+    records = b''
+    if (
+        entries >= 0xFFFF
+        or directory_size >= ZIP64_LIMIT
+        or directory_offset >= ZIP64_LIMIT
+    ):
+        end_offset = directory_offset + directory_size
+        records = struct.pack(
+            '<4sQ2H2L4Q', b'PK\x06\x06', 44, 45, 45, 0, 0,
+            entries, entries, directory_size, directory_offset
+        ) + struct.pack('<4sLQL', b'PK\x06\x07', 0, end_offset, 1)
+    return records + struct.pack(
+        '<4s4H2LH', b'PK\x05\x06', 0, 0,
+        min(entries, 0xFFFF), min(entries, 0xFFFF),
+        min(directory_size, ZIP64_LIMIT), min(directory_offset, ZIP64_LIMIT),
+        0
+    )
+
+
+def export_chunks(author, export_format, using):
+    """
+    Куски выгрузки; using — база, выбранная заранее.
+
+    Заметки читаются уже при отдаче ответа, когда запрос отвязан от
+    основной базы (yanote.routers), поэтому роутер тут не спрашиваем.
+    """
+    chunks = zip_chunks if export_format == 'zip' else ndjson_chunks
+    return chunks(author_notes(author, using))
@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 
 from pytils.translit import slugify
 
+from .importer import ImportFormatError, check_notes
 from .models import Note
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
@@ -16,14 +17,52 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Пустой slug формируется из заголовка.
+
+        Уникальность проверяет база при сохранении: slugs.save_unique.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
+        self.slug_generated = not slug
         if not slug:
             title = cleaned_data.get('title')
             slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """
+        Уникальность slug проверит база при сохранении.
+
+        Остальные уникальные поля проверяем, как ModelForm: кроме полей
+        вне формы и полей, уже не прошедших проверку.
+        """
+        exclude = {'slug', *self.errors}
+        exclude.update(
+            field.name for field in self.instance._meta.fields
+            if field.name not in self.fields
+        )
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
+
+
+class NoteImportForm(forms.Form):
+    """Файл JSON Lines с заметками для импорта."""
+
+    file = forms.FileField(
+        label='Файл',
+        help_text='По заметке на строке: {"title": ..., "text": ..., '
+                  '"slug": ...}'
+    )
+
+    def clean_file(self):
+        """Проверяет все строки; импорт прочитает файл заново."""
+        file = self.cleaned_data['file']
+        try:
+            check_notes(file)
+        except ImportFormatError as error:
+            raise ValidationError(str(error))
+        file.seek(0)
+        return file
@@ -0,0 +1,110 @@
+"""
+Импорт заметок пачками.
+
+Формат — JSON Lines: на строке объект с полями text, title и slug,
+обязательно только text. Заметки пачки получают slug не больше чем
+одним запросом (notes.slugs) и вставляются через bulk_create.
+bulk_create не отправляет post_save, поэтому поисковый индекс
+обновляется здесь же. Строки файла читаются по мере вставки: в памяти
+только текущая пачка.
+"""
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import IntegrityError
+
+from yanote.sqlite.base import immediate_atomic
+
+from .models import Note
+from .search import index_notes
+from .slugs import MAX_ATTEMPTS, MAX_PREFIXES, SlugPool
+
+FIELDS = ('title', 'text', 'slug')
+TITLE_LENGTH = Note._meta.get_field('title').max_length
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_notes(lines):
+    """Словари полей заметок из строк JSON; пустые строки пропускаются."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise ImportFormatError(f'Строка {number}: это не JSON.')
+        if not isinstance(data, dict) or not isinstance(
+            data.get('text'), str
+        ):
+            raise ImportFormatError(f'Строка {number}: нет текста заметки.')
+        row = {
+            field: str(data[field]) for field in FIELDS if data.get(field)
+        }
+        try:
+            validate_slug(row.get('slug', '-'))
+        except ValidationError:
+            raise ImportFormatError(f'Строка {number}: недопустимый slug.')
+        if 'title' in row:
+            # bulk_create не проверяет длину, а SQLite её не ограничивает.
+            row['title'] = row['title'][:TITLE_LENGTH]
+        yield row
+
+
+def check_notes(lines):
+    """
+    Проверяет файл целиком, не сохраняя строки; возвращает их число.
+
+    Ошибка формата находится до импорта, а не после первых пачек.
+    """
+    return sum(1 for _ in read_notes(lines))
+
+
+def _insert(author, rows, pool, using):
+    notes = [Note(author=author, **row) for row in rows]
+    with immediate_atomic(using):
+        pool.assign(notes)
+        Note.objects.using(using).bulk_create(notes)
+        if notes[0].pk is None:
+            # SQLite в Django 3.2 не возвращает id из bulk_create
+            # (RETURNING для SQLite появился в Django 4.0), а индексу
+            # поиска они нужны: лишний запрос на пачку.
+            ids = dict(
+                Note.objects.using(using).filter(
+                    slug__in=[note.slug for note in notes]
+                ).values_list('slug', 'id')
+            )
+            for note in notes:
+                note.pk = ids[note.slug]
+        index_notes(notes, using)
+    return len(notes)
+
+
+def import_notes(author, rows, using, batch_size=MAX_PREFIXES):
+    """
+    Создаёт заметки автора и возвращает их число.
+
+    Каждая пачка — своя транзакция immediate_atomic: блокировка на
+    запись берётся в начале, так что между чтением занятых slug и
+    вставкой никто другой писать не может.
+    """
+    pool = SlugPool(using)
+    rows = iter(rows)
+    count = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return count
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                count += _insert(author, batch, pool, using)
+                break
+            except IntegrityError:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                # slug из пула заняли между пачками: перечитываем.
+                pool.clear()
@@ -0,0 +1,78 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from notes.models import Note
+from notes.views import NotesList
+
+
+def measure(func):
+    """Пик памяти, выделенной за время вызова, в КиБ."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def consume(response):
+    """Дочитывает потоковый ответ, не сохраняя его."""
+    for _ in response.streaming_content:
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Пик выделенной памяти на запрос списка и выгрузку заметок у '
+        'автора с большим числом длинных заметок. Данные создаются во '
+        'временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=10_000)
+        parser.add_argument('--text-size', type=int, default=4096)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        author = get_user_model().objects.create(username='bench-memory')
+        text = 'Длинный текст заметки. ' * (options['text_size'] // 23)
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {number}',
+                text=text,
+                slug=f'bench-memory-{number}',
+                author=author,
+            )
+            for number in range(options['notes'])
+        )
+        client = Client()
+        client.force_login(author)
+        url = reverse('notes:list')
+        export_url = reverse('notes:export')
+        notes = Note.objects.filter(author=author)
+        rows = (
+            ('все поля', lambda: list(notes)),
+            ('список (only)', lambda: list(
+                notes.only(*NotesList.list_fields)
+            )),
+            ('запрос GET', lambda: client.get(url)),
+            ('экспорт NDJSON', lambda: consume(client.get(export_url))),
+            ('экспорт zip', lambda: consume(
+                client.get(export_url, {'format': 'zip'})
+            )),
+        )
+        self.stdout.write(
+            f'{options["notes"]} заметок по {len(text)} символов'
+        )
+        for name, func in rows:
+            self.stdout.write(f'{name:<16} {measure(func):>10.0f} КиБ')
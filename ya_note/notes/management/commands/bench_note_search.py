@@ -0,0 +1,106 @@
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from notes.search import CREATE_TABLE, SEARCH_TABLE, author_terms, build_query
+
+ALPHABET = 'абвгдежзиклмнопрстуфхцчшэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временный индекс заметками многих авторов и '
+        'измеряет задержку префиксного поиска одного автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument(
+            '--own-notes', type=int, default=10_000,
+            help='Заметок у автора, который ищет.'
+        )
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def vocabulary(self, size):
+        return [
+            ''.join(self.random.choices(ALPHABET, k=self.random.randint(4, 9)))
+            for _ in range(size)
+        ]
+
+    def notes(self, total, authors, own_notes, words):
+        for pk in range(1, total + 1):
+            author_id = 1 if pk <= own_notes else self.random.randint(
+                2, authors
+            )
+            yield SimpleNamespace(
+                pk=pk,
+                author_id=author_id,
+                title=' '.join(self.random.choices(words, k=4)),
+                text=' '.join(self.random.choices(words, k=30)),
+            )
+
+    def fill(self, conn, options, words):
+        conn.execute(CREATE_TABLE)
+        notes = self.notes(
+            options['notes'], options['authors'], options['own_notes'], words
+        )
+        batch = []
+        for note in notes:
+            batch.append((note.pk, author_terms(note)))
+            if len(batch) == 10_000:
+                conn.executemany(
+                    f'INSERT INTO {SEARCH_TABLE}(rowid, terms) VALUES (?, ?)',
+                    batch
+                )
+                batch = []
+        conn.executemany(
+            f'INSERT INTO {SEARCH_TABLE}(rowid, terms) VALUES (?, ?)', batch
+        )
+        conn.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        conn.commit()
+
+    def measure(self, conn, words, total):
+        latencies = []
+        for _ in range(total):
+            word = self.random.choice(words)
+            # Как при наборе: от двух букв до целого слова.
+            prefix = word[:self.random.randint(2, len(word))]
+            started = time.perf_counter()
+            conn.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH ? ORDER BY rank LIMIT 20',
+                (build_query(1, prefix),)
+            ).fetchall()
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return latencies
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        words = self.vocabulary(20_000)
+        with tempfile.TemporaryDirectory() as directory:
+            conn = sqlite3.connect(str(Path(directory) / 'search.sqlite3'))
+            started = time.perf_counter()
+            self.fill(conn, options, words)
+            self.stdout.write(
+                f'Индекс на {options["notes"]} заметок построен за '
+                f'{time.perf_counter() - started:.0f} с'
+            )
+            latencies = self.measure(conn, words, options['queries'])
+            conn.close()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f'Префиксный поиск, {options["own_notes"]} своих заметок: '
+            f'p50 {statistics.median(latencies) * 1000:.2f} мс, '
+            f'p99 {p99 * 1000:.2f} мс'
+        )
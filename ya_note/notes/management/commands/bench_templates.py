@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from notes.models import Note
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PROFILES = (
+    ('без кеша', {'debug': True, 'loaders': UNCACHED_LOADERS}),
+    (
+        'кеширующий',
+        {
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', UNCACHED_LOADERS)
+            ],
+        },
+    ),
+)
+
+
+def make_engine(options):
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': config['OPTIONS']['context_processors'],
+            **options,
+        },
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает список заметок без кеша шаблонов и с кеширующим '
+        'загрузчиком, выводит число отрисовок в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2)
+        parser.add_argument('--notes', type=int, default=50)
+
+    def measure(self, engine, name, context, request, seconds):
+        renders = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            engine.get_template(name).render(context, request)
+            renders += 1
+        return renders / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        user = get_user_model()(pk=1, username='Автор')
+        request = RequestFactory().get('/')
+        request.user = user
+        context = {
+            'object_list': [
+                Note(
+                    pk=pk,
+                    title=f'Заметка {pk}',
+                    text='Текст заметки. ' * 20,
+                    slug=f'note-{pk}',
+                    author=user,
+                )
+                for pk in range(1, options['notes'] + 1)
+            ],
+        }
+        self.stdout.write(
+            f'{"":<20}' + ''.join(f'{name:>14}' for name, _ in PROFILES)
+        )
+        rates = [
+            self.measure(
+                make_engine(profile), 'notes/list.html', context, request,
+                options['seconds']
+            )
+            for _, profile in PROFILES
+        ]
+        self.stdout.write(
+            f'{"notes/list.html":<20}'
+            + ''.join(f'{rate:>14.0f}' for rate in rates)
+        )
@@ -0,0 +1,33 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from notes.export import FORMATS, export_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки автора в NDJSON или zip с Markdown. '
+        'Файл пишется по мере чтения заметок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Путь к файлу или «-» для stdout.')
+        parser.add_argument('--author', required=True, help='Имя автора.')
+        parser.add_argument(
+            '--format', choices=sorted(FORMATS), default='ndjson'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(username=options['author'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        chunks = export_chunks(author, options['format'], DEFAULT_DB_ALIAS)
+        if options['output'] == '-':
+            sys.stdout.buffer.writelines(chunks)
+            return
+        with open(options['output'], 'wb') as output:
+            output.writelines(chunks)
@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from notes.importer import (
+    ImportFormatError, check_notes, import_notes, read_notes
+)
+from notes.slugs import MAX_PREFIXES
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки автора из файла JSON Lines: по объекту '
+        'с полями title, text и slug на строке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--author', required=True, help='Имя автора.')
+        parser.add_argument('--batch-size', type=int, default=MAX_PREFIXES)
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.using(DEFAULT_DB_ALIAS).get(
+                username=options['author']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["author"]}.')
+        try:
+            lines = open(options['path'], encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+        with lines:
+            try:
+                check_notes(lines)
+            except ImportFormatError as error:
+                raise CommandError(error)
+            lines.seek(0)
+            started = time.perf_counter()
+            count = import_notes(
+                author, read_notes(lines), DEFAULT_DB_ALIAS,
+                options['batch_size']
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано заметок: {count} за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} в секунду)'
+        ))
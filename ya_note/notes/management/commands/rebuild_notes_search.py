@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from notes.models import Note
+from notes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет поисковый индекс заметок. Нужен после '
+        'loaddata и правок в обход ORM.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Индекс FTS5 есть только в SQLite.')
+        notes = Note.objects.using(DEFAULT_DB_ALIAS)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            rebuild_index(notes, DEFAULT_DB_ALIAS, options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Заметок в индексе: {notes.count()}')
+        )
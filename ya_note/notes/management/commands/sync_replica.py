@@ -0,0 +1,66 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики через backup API: '
+        'однократно или каждые --interval секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Реплики; по умолчанию — DATABASE_REPLICAS.'
+        )
+        parser.add_argument('--interval', type=float, default=0)
+        parser.add_argument(
+            '--pages', type=int, default=1024,
+            help='Страниц за шаг: между шагами основная база свободна.'
+        )
+
+    def get_name(self, alias):
+        if connections[alias].vendor != 'sqlite':
+            raise CommandError(f'{alias}: копировать можно только SQLite.')
+        return connections[alias].settings_dict['NAME']
+
+    def copy(self, source, targets, pages):
+        started = time.perf_counter()
+        # Свои соединения, а не Django: у реплики включён query_only.
+        src = sqlite3.connect(source)
+        try:
+            for name in targets:
+                dst = sqlite3.connect(name, timeout=30)
+                try:
+                    # Реплика заменяется одной транзакцией: читатели
+                    # видят либо старую копию, либо новую целиком.
+                    src.backup(dst, pages=pages)
+                finally:
+                    dst.close()
+        finally:
+            src.close()
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or getattr(
+            settings, 'DATABASE_REPLICAS', ()
+        )
+        if not aliases:
+            raise CommandError(
+                'Укажите реплики аргументами или в DATABASE_REPLICAS.'
+            )
+        source = self.get_name(DEFAULT_DB_ALIAS)
+        targets = [self.get_name(alias) for alias in aliases]
+        interval = options['interval']
+        while True:
+            elapsed = self.copy(source, targets, options['pages'])
+            self.stdout.write(
+                f'{len(targets)} реплик(и) обновлено за {elapsed:.2f} с'
+            )
+            if not interval:
+                break
+            time.sleep(interval)
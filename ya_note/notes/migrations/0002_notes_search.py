@@ -0,0 +1,54 @@
+import re
+
+from django.db import migrations
+
+# SQL и правила индексации на момент миграции; notes.search может
+# меняться дальше.
+CREATE_TABLE = (
+    'CREATE VIRTUAL TABLE notes_search USING fts5(terms, '
+    "tokenize=\"unicode61 remove_diacritics 2 tokenchars '_'\")"
+)
+INSERT = 'INSERT INTO notes_search(rowid, terms) VALUES (%s, %s)'
+WORD = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def author_terms(note):
+    words = WORD.findall(
+        f'{note.title} {note.text}'.lower().replace('ё', 'е')
+    )
+    return ' '.join(f'u{note.author_id}_{word}' for word in words)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE)
+    notes = apps.get_model('notes', 'Note').objects.using(
+        schema_editor.connection.alias
+    ).only('author', 'title', 'text')
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for note in notes.iterator(chunk_size=BATCH_SIZE):
+            batch.append((note.pk, author_terms(note)))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(INSERT, batch)
+                batch = []
+        cursor.executemany(INSERT, batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS notes_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
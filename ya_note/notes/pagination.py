@@ -0,0 +1,118 @@
+"""Постраничный вывод по курсору (keyset) вместо OFFSET."""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """Страница, полученная по курсору, а не по смещению."""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    raw = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        )
+    except (binascii.Error, ValueError):
+        raise Http404('Некорректный курсор.')
+    if not isinstance(values, list) or len(values) != size:
+        raise Http404('Некорректный курсор.')
+    return values
+
+
+def _field_value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def cursor_condition(ordering, values):
+    """
+    Условие «строго после курсора» для сортировки по нескольким полям.
+
+    Первое поле дополнительно ограничено нестрогим неравенством:
+    по нему база находит начало страницы в индексе, не просматривая
+    предыдущие строки.
+    """
+    first, *_ = ordering
+    seek = 'lte' if first.startswith('-') else 'gte'
+    condition = Q()
+    for index, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {
+            previous.lstrip('-'): value
+            for previous, value in zip(ordering[:index], values)
+        }
+        condition |= Q(**equal, **{
+            f'{field.lstrip("-")}__{lookup}': values[index]
+        })
+    return Q(**{f'{first.lstrip("-")}__{seek}': values[0]}) & condition
+
+
+def paginate_keyset(queryset, ordering, cursor, per_page):
+    """
+    Возвращает страницу из per_page объектов, следующих за курсором.
+
+    Стоимость запроса не зависит от того, насколько далеко страница
+    от начала списка.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            values = decode_cursor(cursor, len(ordering))
+            queryset = queryset.filter(cursor_condition(ordering, values))
+        except (ValidationError, TypeError, ValueError):
+            raise Http404('Некорректный курсор.')
+    rows = list(queryset[:per_page + 1])
+    if len(rows) <= per_page:
+        return KeysetPage(rows)
+    rows = rows[:per_page]
+    return KeysetPage(rows, encode_cursor(
+        _field_value(rows[-1], field.lstrip('-')) for field in ordering
+    ))
+
+
+class KeysetPaginationMixin:
+    """
+    Постраничный вывод для ListView по курсору.
+
+    Номер страницы не используется: в шаблон попадает page_obj
+    со ссылкой на следующую страницу в next_cursor.
+    """
+    keyset_ordering = ()
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_keyset(
+            queryset,
+            self.keyset_ordering,
+            self.request.GET.get(self.cursor_kwarg),
+            page_size
+        )
+        return None, page, page.object_list, page.has_next
@@ -0,0 +1,68 @@
+"""Бюджет SQL-запросов на представление."""
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Обёртка для execute_wrapper, считающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Считает SQL-запросы представления вместе с отрисовкой шаблона.
+
+    query_budget — число или словарь {метод: число}. При превышении
+    пишем предупреждение в лог, а с QUERY_BUDGET_STRICT падаем
+    с QueryBudgetExceeded. Запросы middleware (сессия, пользователь)
+    в бюджет не входят. Итог сохраняется в request.query_count.
+    """
+    query_budget = None
+
+    def get_query_budget(self):
+        if isinstance(self.query_budget, dict):
+            return self.query_budget.get(self.request.method.lower())
+        return self.query_budget
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            return super().dispatch(request, *args, **kwargs)
+        user = getattr(request, 'user', None)
+        if user is not None:
+            # Сессию и пользователя загружаем до подсчёта:
+            # это работа middleware, а не представления.
+            user.is_authenticated
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            # Считаем запросы и к основной базе, и к репликам.
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = super().dispatch(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+        request.query_count = counter.count
+        budget = self.get_query_budget()
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{type(self).__name__} {request.method}: '
+                f'{counter.count} SQL-запросов при бюджете {budget}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
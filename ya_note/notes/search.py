@@ -0,0 +1,105 @@
+"""
+Поиск по заметкам автора: SQLite FTS5.
+
+Каждое слово индексируется вместе с id автора: «u42_покупки».
+Словарь FTS5 отсортирован, поэтому префиксный запрос «u42_пок*»
+читает только термины этого автора и не трогает чужие заметки,
+сколько бы их ни было. Индекс обновляют сигналы (notes/signals.py).
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import Note
+
+SEARCH_TABLE = 'notes_search'
+NOTE_TABLE = Note._meta.db_table
+
+# «_» — часть токена, иначе префикс автора отделится от слова.
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(terms, '
+    "tokenize=\"unicode61 remove_diacritics 2 tokenchars '_'\")"
+)
+
+SEARCH = (
+    f'SELECT n.* FROM {SEARCH_TABLE} s '
+    f'JOIN {NOTE_TABLE} n ON n.id = s.rowid '
+    f'WHERE {SEARCH_TABLE} MATCH %s AND n.author_id = %s '
+    'ORDER BY s.rank LIMIT %s'
+)
+
+WORD = re.compile(r'\w+')
+MAX_TERMS = 8
+
+
+def words(text):
+    # unicode61 не сводит «ё» к «е».
+    return WORD.findall(text.lower().replace('ё', 'е'))
+
+
+def author_terms(note):
+    """Текст для индекса: слова заголовка и текста с префиксом автора."""
+    return ' '.join(
+        f'u{note.author_id}_{word}'
+        for word in words(note.title) + words(note.text)
+    )
+
+
+def build_query(author_id, text):
+    """Все слова обязательны, каждое ищется по префиксу."""
+    return ' '.join(
+        f'"u{author_id}_{word}"*' for word in words(text)[:MAX_TERMS]
+    )
+
+
+def index_notes(notes, using, created=True):
+    """Добавляет заметки в индекс или обновляет их там."""
+    if connections[using].vendor != 'sqlite':
+        return
+    if created:
+        sql = f'INSERT INTO {SEARCH_TABLE}(rowid, terms) VALUES (%s, %s)'
+        params = [(note.pk, author_terms(note)) for note in notes]
+    else:
+        sql = f'UPDATE {SEARCH_TABLE} SET terms = %s WHERE rowid = %s'
+        params = [(author_terms(note), note.pk) for note in notes]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def unindex_notes(ids, using):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in ids]
+        )
+
+
+def rebuild_index(notes, using, batch_size=1000):
+    """Заполняет индекс заново; notes — QuerySet всех заметок."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    batch = []
+    for note in notes.only('author', 'title', 'text').iterator(
+        chunk_size=batch_size
+    ):
+        batch.append(note)
+        if len(batch) == batch_size:
+            index_notes(batch, using)
+            batch = []
+    index_notes(batch, using)
+
+
+def search_notes(author, text, limit):
+    """Заметки автора, подходящие под запрос, самые релевантные — первыми."""
+    query = build_query(author.pk, text)
+    if not query:
+        return []
+    notes = Note.objects.filter(author=author)
+    if connections[notes.db].vendor != 'sqlite':
+        return list(notes.filter(
+            Q(title__icontains=text) | Q(text__icontains=text)
+        )[:limit])
+    return list(Note.objects.raw(SEARCH, (query, author.pk, limit)))
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import forget_note
+from .models import Note
+from .search import index_notes, unindex_notes
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, created, raw, using, **kwargs):
+    if not raw:
+        index_notes([instance], using, created=created)
+
+
+@receiver(post_delete, sender=Note)
+def unindex_note(sender, instance, using, **kwargs):
+    unindex_notes([instance.pk], using)
+
+
+def forget_on_commit(note, using):
+    """
+    Удаляет заметку из кеша после коммита.
+
+    До коммита параллельный запрос ещё читает прежнюю строку и успел
+    бы снова положить её в кеш.
+    """
+    slugs = (note.slug, getattr(note, 'loaded_slug', None))
+    author_id = note.author_id
+    transaction.on_commit(
+        lambda: forget_note(author_id, *slugs), using=using
+    )
+
+
+@receiver(post_save, sender=Note)
+def forget_saved_note(sender, instance, using, **kwargs):
+    forget_on_commit(instance, using)
+    instance.loaded_slug = instance.slug
+
+
+@receiver(post_delete, sender=Note)
+def forget_deleted_note(sender, instance, using, **kwargs):
+    forget_on_commit(instance, using)
@@ -0,0 +1,157 @@
+"""
+Уникальные slug для пачки заметок.
+
+Форма заметки slug заранее не проверяет: конфликт ловит save_unique.
+При импорте занятые slug всей пачки читаются одним запросом по
+префиксам, а совпадения получают суффиксы «-2», «-3» и так далее.
+"""
+from django.db import IntegrityError, connections, router
+
+from pytils.translit import slugify
+from yanote.sqlite.base import immediate_atomic
+
+from .models import Note
+
+NOTE_TABLE = Note._meta.db_table
+MAX_LENGTH = Note._meta.get_field('slug').max_length
+# Место под «-» и номер: длинная основа обрезается перед суффиксом.
+SUFFIX_LENGTH = 7
+# Каждое условие OR углубляет дерево выражения, а SQLite ограничивает
+# его глубину тысячей.
+MAX_PREFIXES = 450
+# Для заголовков, из которых slugify ничего не оставляет.
+DEFAULT_SLUG = 'note'
+# Столько раз save_unique пробует сохранить заметку при гонке за slug.
+MAX_ATTEMPTS = 5
+
+
+class SlugTaken(Exception):
+    """Заданный вручную slug уже занят."""
+
+
+def _stem(base):
+    return base[:MAX_LENGTH - SUFFIX_LENGTH]
+
+
+def _prefix_conditions(base):
+    # «-» в slug меньше букв и цифр, поэтому диапазон охватывает
+    # ровно основу и её варианты с суффиксами; поиск идёт по
+    # уникальному индексу slug.
+    stem = _stem(base)
+    yield 'slug BETWEEN %s AND %s', (stem, f'{stem}-\uffff')
+    if stem != base:
+        yield 'slug = %s', (base,)
+
+
+def base_slugs(notes):
+    """Заданный slug или slugify заголовка; каждый заголовок — один раз."""
+    cache = {}
+    bases = []
+    for note in notes:
+        if note.slug:
+            bases.append(note.slug[:MAX_LENGTH])
+            continue
+        if note.title not in cache:
+            cache[note.title] = (
+                slugify(note.title)[:MAX_LENGTH] or DEFAULT_SLUG
+            )
+        bases.append(cache[note.title])
+    return bases
+
+
+def taken_slugs(bases, using):
+    """Занятые slug, с которыми могут совпасть основы и их суффиксы."""
+    # Запрос собирается вручную: ORM строит OR из сотен условий
+    # за квадратичное время.
+    bases = sorted(set(bases))
+    taken = set()
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(bases), MAX_PREFIXES):
+            conditions, params = [], []
+            for base in bases[start:start + MAX_PREFIXES]:
+                for condition, values in _prefix_conditions(base):
+                    conditions.append(condition)
+                    params.extend(values)
+            cursor.execute(
+                f'SELECT slug FROM {NOTE_TABLE} '
+                f'WHERE {" OR ".join(conditions)}',
+                params
+            )
+            taken.update(slug for slug, in cursor.fetchall())
+    return taken
+
+
+class SlugPool:
+    """
+    Slug, выданные за один импорт.
+
+    Занятые slug каждой основы читаются из базы один раз: следующие
+    пачки с теми же заголовками обходятся без запроса, а номера
+    продолжаются с последнего выданного. Если между пачками кто-то
+    займёт slug из пула, вставка упадёт на уникальном индексе —
+    тогда пул очищают методом clear() и пробуют ещё раз.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.clear()
+
+    def clear(self):
+        self.taken = set()
+        self.loaded = set()
+        self.numbers = {}
+
+    def load(self, bases):
+        new_bases = set(bases) - self.loaded
+        if new_bases:
+            self.taken |= taken_slugs(new_bases, self.using)
+            self.loaded |= new_bases
+
+    def assign(self, notes):
+        """Проставляет заметкам уникальные slug."""
+        bases = base_slugs(notes)
+        self.load(bases)
+        for note, base in zip(notes, bases):
+            note.slug = self.unique(base)
+
+    def unique(self, base):
+        slug = base
+        if slug in self.taken:
+            number = self.numbers.get(base, 1)
+            while slug in self.taken:
+                number += 1
+                slug = f'{_stem(base)}-{number}'
+            self.numbers[base] = number
+        self.taken.add(slug)
+        return slug
+
+
+def save_unique(note, generated):
+    """
+    Сохраняет заметку, не проверяя slug заранее.
+
+    Занятый slug обнаруживает уникальный индекс, так что обычно запрос
+    на проверку не нужен. После конфликта slug, полученный из заголовка
+    (generated), заменяется свободным с суффиксом, и сохранение
+    повторяется в новой точке сохранения. Заданный вручную slug не
+    меняется: тогда SlugTaken. Прежний slug редактируемой заметки
+    занятым не считается: она может его сохранить.
+    """
+    using = router.db_for_write(Note, instance=note)
+    base = note.slug
+    pool = SlugPool(using)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with immediate_atomic(using):
+                note.save(using=using)
+            return note
+        except IntegrityError:
+            pool.clear()
+            pool.load([base])
+            if note.slug not in pool.taken or attempt == MAX_ATTEMPTS:
+                raise
+            if not generated:
+                raise SlugTaken(note.slug)
+            if note.pk is not None:
+                pool.taken.discard(getattr(note, 'loaded_slug', None))
+            note.slug = pool.unique(base)
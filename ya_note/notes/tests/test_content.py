@@ -1,9 +1,19 @@
+import io
+import zipfile
+from http import HTTPStatus
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
+from notes.cache import get_cache
 from notes.forms import NoteForm
+from notes.importer import read_notes
 from notes.models import Note
+from notes.views import NoteExport
+from yanote.routers import PIN_COOKIE, PrimaryPinMiddleware
 
 User = get_user_model()
 
@@ -13,6 +23,7 @@ class TestRoutes(TestCase):
     LIST_URL = reverse('notes:list')
 
     def setUp(self):
+        get_cache().clear()
         self.author = User.objects.create(username='Автор')
         self.reader = User.objects.create(username='Читатель простой')
         self.note = Note.objects.create(
@@ -33,6 +44,11 @@ class TestRoutes(TestCase):
             object_list = response.context['object_list']
             self.assertEqual((self.note in object_list), note_in_list)
 
+    def test_notes_list_skips_text(self):
+        self.client.force_login(self.author)
+        note = self.client.get(self.LIST_URL).context['object_list'][0]
+        self.assertIn('text', note.get_deferred_fields())
+
     def test_pages_contains_form(self):
         urls = (
             ('notes:add', None),
@@ -44,3 +60,155 @@ class TestRoutes(TestCase):
             response = self.client.get(url)
             self.assertIn('form', response.context)
             self.assertIsInstance(response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_PER_PAGE=2)
+class TestPagination(TestCase):
+
+    LIST_URL = reverse('notes:list')
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        reader = User.objects.create(username='Читатель простой')
+        self.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=self.author
+            )
+            for index in range(5)
+        ]
+        Note.objects.create(title='Чужая', text='Текст', author=reader)
+        self.client.force_login(self.author)
+
+    def test_pages_cover_own_notes_once(self):
+        pages, data = [], {}
+        while True:
+            page = self.client.get(self.LIST_URL, data).context['page_obj']
+            pages.append(list(page.object_list))
+            if not page.has_next:
+                break
+            data = {'cursor': page.next_cursor}
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.notes)
+
+    def test_bad_cursor(self):
+        response = self.client.get(self.LIST_URL, {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_query_uses_index(self):
+        plan = Note.objects.filter(
+            author=self.author, id__gt=self.notes[2].id
+        ).order_by('id')[:3].explain()
+        self.assertNotIn('SCAN', plan.replace('SCAN CONSTANT', ''))
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestExport(TestCase):
+
+    EXPORT_URL = reverse('notes:export')
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        reader = User.objects.create(username='Читатель простой')
+        self.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text=f'Текст «{index}»',
+                author=self.author
+            )
+            for index in range(3)
+        ]
+        Note.objects.create(title='Чужая', text='Текст', author=reader)
+        self.client.force_login(self.author)
+
+    def export(self, export_format):
+        response = self.client.get(
+            self.EXPORT_URL, {'format': export_format}
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_can_be_imported_back(self):
+        rows = list(
+            read_notes(self.export('ndjson').decode().splitlines())
+        )
+        self.assertEqual(rows, [
+            {'title': note.title, 'text': note.text, 'slug': note.slug}
+            for note in self.notes
+        ])
+
+    def test_zip_of_markdown_files(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.export('zip')))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            archive.namelist(), [f'{note.slug}.md' for note in self.notes]
+        )
+        note = self.notes[0]
+        self.assertEqual(
+            archive.read(f'{note.slug}.md').decode(),
+            f'# {note.title}\n\n{note.text}\n'
+        )
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_pinned_export_reads_primary(self):
+        view = PrimaryPinMiddleware(NoteExport.as_view())
+        for pinned, using in ((False, 'replica'), (True, 'default')):
+            request = RequestFactory().get(self.EXPORT_URL)
+            request.user = self.author
+            if pinned:
+                request.COOKIES[PIN_COOKIE] = '1'
+            with mock.patch(
+                'notes.views.export_chunks', return_value=iter(())
+            ) as export_chunks:
+                view(request)
+            self.assertEqual(export_chunks.call_args.args[2], using)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.EXPORT_URL, {'format': 'pdf'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class TestSearch(TestCase):
+
+    SEARCH_URL = reverse('notes:search')
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        self.reader = User.objects.create(username='Читатель простой')
+        self.note = Note.objects.create(
+            title='Список покупок',
+            text='Молоко, ёлочные игрушки',
+            slug='shopping',
+            author=self.author
+        )
+        Note.objects.create(
+            title='Покупки соседа',
+            text='Хлеб',
+            slug='other',
+            author=self.reader
+        )
+        self.client.force_login(self.author)
+
+    def search(self, query):
+        response = self.client.get(self.SEARCH_URL, {'q': query})
+        return response.context['object_list']
+
+    def test_search_by_prefix_only_own_notes(self):
+        for query in ('пок', 'список пок', 'елоч', 'МОЛОКО'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [self.note])
+        self.assertEqual(self.search('хлеб'), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_search_follows_edit_and_delete(self):
+        self.note.title = 'Дела'
+        self.note.save()
+        self.assertEqual(self.search('список'), [])
+        self.assertEqual(self.search('дел'), [self.note])
+        self.note.delete()
+        self.assertEqual(self.search('дел'), [])
+
+    def test_partial_returns_results_only(self):
+        response = self.client.get(
+            self.SEARCH_URL, {'q': 'пок', 'partial': 1}
+        )
+        self.assertTemplateUsed(response, 'includes/search_results.html')
+        self.assertTemplateNotUsed(response, 'base.html')
@@ -1,12 +1,28 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from notes.cache import get_cache, get_stats, note_key
 from notes.forms import WARNING
+from notes.importer import import_notes
 from notes.models import Note
+from notes.search import search_notes
 from pytils.translit import slugify
+from yanote.routers import (
+    PIN_COOKIE, PrimaryPinMiddleware, PrimaryReplicaRouter
+)
 
 User = get_user_model()
 
@@ -112,6 +128,137 @@ class TestSlugUnic(TestCase):
         self.assertEqual(notes_count, 1)
 
 
+class TestConcurrentCreation(TransactionTestCase):
+
+    THREADS = 8
+    NOTES_PER_THREAD = 5
+    TITLE = 'Одинаковый заголовок'
+
+    def setUp(self):
+        self.user = User.objects.create(username='Гость')
+
+    def create_notes(self, _):
+        client = Client()
+        client.force_login(self.user)
+        try:
+            return [
+                client.post(reverse('notes:add'), {
+                    'title': self.TITLE, 'text': 'Текст'
+                }).status_code
+                for _ in range(self.NOTES_PER_THREAD)
+            ]
+        finally:
+            connections.close_all()
+
+    def test_identical_titles_from_many_threads(self):
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            statuses = sum(
+                executor.map(self.create_notes, range(self.THREADS)), []
+            )
+        total = self.THREADS * self.NOTES_PER_THREAD
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * total)
+        base = slugify(self.TITLE)
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {base} | {f'{base}-{number}' for number in range(2, total + 1)}
+        )
+
+
+class TestNoteImport(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='Гость')
+        Note.objects.create(
+            title='Покупки', text='Хлеб', slug='pokupki', author=self.user
+        )
+        self.auth_client = Client()
+        self.auth_client.force_login(self.user)
+
+    def test_slugs_unique_in_batch_and_database(self):
+        rows = [
+            {'title': 'Покупки', 'text': 'Молоко'},
+            {'title': 'Покупки', 'text': 'Сыр'},
+            {'title': 'Дела', 'text': 'Позвонить', 'slug': 'pokupki-2'},
+            {'title': 'Я' * 100, 'text': 'Длинный'},
+            {'title': 'Я' * 100, 'text': 'Ещё длинный'},
+            {'title': '!!!', 'text': 'Без букв'},
+        ]
+        self.assertEqual(import_notes(self.user, rows, 'default'), 6)
+        slugs = list(
+            Note.objects.order_by('id').values_list('slug', flat=True)
+        )
+        self.assertEqual(slugs[:4], [
+            'pokupki', 'pokupki-2', 'pokupki-3', 'pokupki-2-2'
+        ])
+        self.assertEqual(slugs[4], slugify('Я' * 100)[:100])
+        self.assertEqual(slugs[5], slugify('Я' * 100)[:93] + '-2')
+        self.assertEqual(slugs[6], 'note')
+
+    def test_slug_queries_do_not_grow_with_batch(self):
+        counts = []
+        for size in (2, 40):
+            rows = [
+                {'title': f'Заметка {size} {number}', 'text': 'Текст'}
+                for number in range(size)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                import_notes(self.user, rows, 'default')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_retries_batch_when_slug_taken_meanwhile(self):
+        # Первое чтение «не видит» заметку pokupki, как если бы её
+        # создали уже после того, как пул прочитал занятые slug.
+        with mock.patch(
+            'notes.slugs.taken_slugs', side_effect=[set(), {'pokupki'}]
+        ):
+            import_notes(
+                self.user, [{'title': 'Покупки', 'text': 'Сыр'}], 'default'
+            )
+        self.assertEqual(Note.objects.get(text='Сыр').slug, 'pokupki-2')
+
+    def test_retries_batch_more_than_once(self):
+        with mock.patch(
+            'notes.slugs.taken_slugs',
+            side_effect=[set(), set(), {'pokupki'}]
+        ):
+            import_notes(
+                self.user, [{'title': 'Покупки', 'text': 'Сыр'}], 'default'
+            )
+        self.assertEqual(Note.objects.get(text='Сыр').slug, 'pokupki-2')
+
+    def test_imported_notes_are_searchable(self):
+        import_notes(self.user, [{'text': 'Ёлочные игрушки'}], 'default')
+        self.assertEqual(
+            [note.text for note in search_notes(self.user, 'елоч', 10)],
+            ['Ёлочные игрушки']
+        )
+
+    def test_upload(self):
+        url = reverse('notes:import')
+        lines = '\n'.join(json.dumps(row) for row in (
+            {'title': 'Первая', 'text': 'Текст'},
+            {'title': 'Вторая', 'text': 'Текст', 'slug': 'vtoraya'},
+        ))
+        response = self.client.post(url)
+        self.assertRedirects(response, f'{reverse("users:login")}?next={url}')
+        response = self.auth_client.post(url, {
+            'file': SimpleUploadedFile('notes.jsonl', lines.encode())
+        })
+        self.assertEqual(response.context['imported'], 2)
+        self.assertEqual(Note.objects.filter(author=self.user).count(), 3)
+
+    def test_upload_rejects_bad_line(self):
+        lines = '{"text": "Текст"}\n{"title": "Без текста"}'
+        response = self.auth_client.post(reverse('notes:import'), {
+            'file': SimpleUploadedFile('notes.jsonl', lines.encode())
+        })
+        self.assertFormError(
+            response, 'form', 'file', 'Строка 2: нет текста заметки.'
+        )
+        self.assertEqual(Note.objects.count(), 1)
+
+
 class TestNoteEditDelete(TestCase):
     TITLE = 'Заголовок'
     TEXT = 'Заметка'
@@ -121,6 +268,7 @@ class TestNoteEditDelete(TestCase):
     NEXT_SLUG = 'Slug_2'
 
     def setUp(self):
+        get_cache().clear()
         self.author = User.objects.create(username='Автор')
         self.author_client = Client()
         self.author_client.force_login(self.author)
@@ -171,6 +319,21 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(self.note.slug, self.NEXT_SLUG)
         self.assertEqual(self.note.title, self.NEXT_TITLE)
 
+    def test_edit_keeps_own_suffixed_slug(self):
+        """Слаг из заголовка занят другой заметкой, но не свой прежний."""
+        base = slugify(self.NEXT_TITLE)
+        Note.objects.create(
+            title=self.NEXT_TITLE, text=self.TEXT, slug=base,
+            author=self.reader
+        )
+        Note.objects.filter(pk=self.note.pk).update(slug=f'{base}-2')
+        self.author_client.post(
+            reverse('notes:edit', args=(f'{base}-2',)),
+            data={**self.form_data, 'slug': ''}
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.slug, f'{base}-2')
+
     def test_user_cant_edit_note_of_another_user(self):
         """Пользователь не может может редактировать чужие заметки."""
         response = self.reader_client.post(self.edit_url, data=self.form_data)
@@ -180,3 +343,97 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(self.note.text, self.TEXT)
         self.assertEqual(self.note.slug, self.SLUG)
         self.assertEqual(self.note.title, self.TITLE)
+
+
+class TestNoteCache(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = User.objects.create(username='Автор')
+        self.reader = User.objects.create(username='Читатель')
+        self.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=self.author
+        )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.detail_url = reverse('notes:detail', args=(self.note.slug,))
+
+    def test_repeated_reads_hit_cache(self):
+        for _ in range(3):
+            response = self.author_client.get(self.detail_url)
+            self.assertContains(response, 'Текст')
+        self.assertEqual(get_stats(), {'hits': 2, 'misses': 1})
+
+    def test_cached_note_not_shared_between_authors(self):
+        self.author_client.get(self.detail_url)
+        self.client.force_login(self.reader)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_edit_with_new_slug_invalidates_old_key(self):
+        self.author_client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(
+                reverse('notes:edit', args=(self.note.slug,)),
+                {'title': 'Новый', 'text': 'Новый текст', 'slug': 'renamed'}
+            )
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.author_client.get(
+            reverse('notes:detail', args=('renamed',))
+        )
+        self.assertContains(response, 'Новый текст')
+
+    def test_delete_invalidates(self):
+        self.author_client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(
+                reverse('notes:delete', args=(self.note.slug,))
+            )
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_key_forgotten_only_after_commit(self):
+        self.author_client.get(self.detail_url)
+        key = note_key(self.author.pk, self.note.slug)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.text = 'Новый текст'
+            self.note.save()
+            # До коммита другие запросы ещё видят прежнюю строку.
+            self.assertIsNotNone(get_cache().get(key))
+        self.assertIsNone(get_cache().get(key))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaRouter(SimpleTestCase):
+
+    def test_reads_from_replica_until_write(self):
+        def view(request):
+            self.assertEqual(Note.objects.all().db, 'replica')
+            self.assertEqual(Note.objects.select_for_update().db, 'default')
+            self.assertEqual(Note.objects.all().db, 'default')
+            return HttpResponse()
+
+        PrimaryPinMiddleware(view)(RequestFactory().get('/'))
+
+    def test_write_outside_request_does_not_pin(self):
+        self.assertEqual(Note.objects.select_for_update().db, 'default')
+        self.assertEqual(Note.objects.all().db, 'replica')
+
+    def test_read_does_not_renew_pin_cookie(self):
+        router = PrimaryReplicaRouter()
+        factory = RequestFactory()
+
+        def write(request):
+            router.db_for_write(Note)
+            return HttpResponse()
+
+        def read(request):
+            self.assertEqual(router.db_for_read(Note), 'default')
+            return HttpResponse()
+
+        response = PrimaryPinMiddleware(write)(factory.get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        factory.cookies[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        response = PrimaryPinMiddleware(read)(factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.cache import get_cache
+from notes.models import Note
+from notes.queries import QueryBudgetExceeded
+from notes.views import NotesList
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True)
+class TestQueryBudget(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = User.objects.create(username='Автор')
+        self.client.force_login(self.author)
+        self.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст',
+            slug='slug',
+            author=self.author
+        )
+        self.form_data = {'title': 'Новый', 'text': 'Текст', 'slug': 'new'}
+
+    def test_views_query_count(self):
+        slug = (self.note.slug,)
+        requests = (
+            ('get', 'notes:home', None, None, 0),
+            ('get', 'notes:success', None, None, 0),
+            ('get', 'notes:list', None, None, 1),
+            ('get', 'notes:detail', slug, None, 1),
+            ('get', 'notes:add', None, None, 0),
+            # Заметку уже прочитала страница detail: она в кеше.
+            ('get', 'notes:edit', slug, None, 0),
+            ('get', 'notes:delete', slug, None, 0),
+            ('get', 'notes:search', None, {'q': 'заг'}, 1),
+            # Точка сохранения, запись в заметки, запись в поисковый
+            # индекс и RELEASE. Проверки slug запросом нет.
+            ('post', 'notes:add', None, self.form_data, 4),
+            ('post', 'notes:edit', slug, {**self.form_data, 'slug': 'x'}, 5),
+            ('delete', 'notes:delete', ('x',), None, 3),
+        )
+        for method, name, args, data, expected_count in requests:
+            with self.subTest(method=method, name=name):
+                response = getattr(self.client, method)(
+                    reverse(name, args=args), data=data
+                )
+                self.assertEqual(
+                    response.wsgi_request.query_count, expected_count
+                )
+
+    def test_query_budget_exceeded(self):
+        with mock.patch.object(NotesList, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('notes:list'))
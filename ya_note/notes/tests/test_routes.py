@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
 
+from notes.cache import get_cache
 from notes.models import Note
 
 User = get_user_model()
@@ -12,6 +13,7 @@ User = get_user_model()
 class TestRoutes(TestCase):
 
     def setUp(self):
+        get_cache().clear()
         self.author = User.objects.create(username='Автор')
         self.reader = User.objects.create(username='Читатель простой')
         self.note = Note.objects.create(
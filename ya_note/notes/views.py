@@ -1,22 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import router
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .cache import CachedNoteMixin
+from .export import FORMATS, export_chunks
+from .forms import WARNING, NoteForm, NoteImportForm
+from .importer import import_notes, read_notes
 from .models import Note
+from .pagination import KeysetPaginationMixin
+from .queries import QueryBudgetMixin
+from .search import search_notes
+from .slugs import SlugTaken, save_unique
 
 
-class Home(generic.TemplateView):
+class Home(QueryBudgetMixin, generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
+    query_budget = 0
 
 
-class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
+class NoteSuccess(
+        QueryBudgetMixin,
+        LoginRequiredMixin,
+        generic.TemplateView
+):
     """Страница успешного выполнения операции."""
     template_name = 'notes/success.html'
+    query_budget = 0
 
 
-class NoteBase(LoginRequiredMixin):
+class NoteBase(QueryBudgetMixin, LoginRequiredMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
@@ -26,34 +45,139 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохраняет заметку из формы без предварительной проверки slug."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        try:
+            self.object = save_unique(
+                form.save(commit=False), form.slug_generated
+            )
+        except SlugTaken as error:
+            form.add_error('slug', f'{error}{WARNING}')
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+    # Точка сохранения (в autocommit — BEGIN), INSERT, индекс и
+    # RELEASE; COMMIT не считается.
+    query_budget = {'get': 0, 'post': 4}
+
+    def form_valid(self, form):
+        """Заметку сохраняет CreateView, нам остаётся указать автора."""
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(
+        NoteBase, CachedNoteMixin, NoteFormMixin, generic.UpdateView
+):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+    query_budget = {'get': 1, 'post': 5}
 
 
-class NoteDelete(NoteBase, generic.DeleteView):
+class NoteDelete(NoteBase, CachedNoteMixin, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
+    query_budget = {'get': 1, 'post': 3, 'delete': 3}
+
 
+class NoteImport(NoteBase, generic.FormView):
+    """Импорт заметок из файла JSON Lines."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+    # Запросов при импорте — по несколько на пачку.
+    query_budget = {'get': 0}
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    def form_valid(self, form):
+        started = time.perf_counter()
+        count = import_notes(
+            self.request.user,
+            read_notes(form.cleaned_data['file']),
+            router.db_for_write(Note)
+        )
+        elapsed = time.perf_counter() - started
+        return self.render_to_response(self.get_context_data(
+            imported=count,
+            elapsed=elapsed,
+            rate=count / elapsed if elapsed else 0,
+        ))
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя: NDJSON или zip с Markdown."""
+    # Сами заметки читаются при отдаче ответа, после представления.
+    query_budget = 0
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in FORMATS:
+            raise BadRequest('Неизвестный формат выгрузки.')
+        content_type, filename = FORMATS[export_format]
+        # Базу выбираем сейчас: после импорта запрос привязан к
+        # основной, а при отдаче ответа привязки уже нет.
+        response = StreamingHttpResponse(
+            export_chunks(
+                request.user, export_format, router.db_for_read(Note)
+            ),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class NotesList(NoteBase, KeysetPaginationMixin, generic.ListView):
+    """Заметки пользователя, по NOTES_PER_PAGE на странице."""
     template_name = 'notes/list.html'
+    query_budget = 1
+    list_fields = ('id', 'slug', 'title')
+    # Вместе с фильтром по автору — индекс (author, id).
+    keyset_ordering = ('id',)
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PER_PAGE
 
+    def get_queryset(self):
+        """Текст заметок в списке не выводится: не загружаем его."""
+        return super().get_queryset().only(*self.list_fields)
 
-class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+
+class NoteDetail(NoteBase, CachedNoteMixin, generic.DetailView):
+    """Заметка подробно; повторные просмотры — без запросов к базе."""
     template_name = 'notes/detail.html'
+    query_budget = 1
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """
+    Поиск по своим заметкам.
+
+    С параметром partial отдаём только список: его подгружает
+    поле поиска по мере набора.
+    """
+    template_name = 'notes/search.html'
+    query_budget = 1
+    search_limit = 20
+
+    def get_template_names(self):
+        if 'partial' in self.request.GET:
+            return ['includes/search_results.html']
+        return super().get_template_names()
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            self.search_limit
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
@@ -0,0 +1,77 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в DATABASE_REPLICAS. После первой записи запрос
+«прилипает» к основной базе до конца, а cookie продлевает это на
+DATABASE_REPLICA_PIN_SECONDS: реплика — периодическая копия и может
+ещё не знать о только что сохранённом. Cookie ставится только после
+записи, поэтому запросы на чтение её не продлевают. Вне запроса
+(команды, потоки, тесты) запись соединение не привязывает.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_primary'
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+_wrote = ContextVar('db_wrote_to_primary', default=False)
+_in_request = ContextVar('db_in_request', default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Сюда же попадают select_for_update, get_or_create и
+        # чтения внутри save(): у таких QuerySet выставлен _for_write.
+        if _in_request.get():
+            pin_to_primary()
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Во всех базах одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему вместе с копией основной базы.
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    """Сбрасывает привязку к основной базе между запросами."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote_token = _wrote.set(False)
+        request_token = _in_request.set(True)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and getattr(settings, 'DATABASE_REPLICAS', ()):
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax'
+                )
+        finally:
+            _pinned.reset(token)
+            _wrote.reset(wrote_token)
+            _in_request.reset(request_token)
+        return response
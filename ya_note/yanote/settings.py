@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yanote.routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -54,11 +55,57 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с WAL, busy_timeout и другими PRAGMA: yanote/sqlite/base.py.
+        'ENGINE': 'yanote.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Соединение живёт между запросами и не открывается заново.
+        'CONN_MAX_AGE': 600,
+        # Тестовая база в файле: в памяти SQLite блокирует таблицы
+        # целиком и не ждёт busy_timeout, а тесты пишут из потоков.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # Копия default, которую обновляет manage.py sync_replica.
+    'replica': {
+        'ENGINE': 'yanote.sqlite',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'pragmas': {'query_only': 1}},
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['yanote.routers.PrimaryReplicaRouter']
+
+# Базы только для чтения. Чтобы читать с копии, запустите
+# sync_replica --interval 5 и добавьте сюда 'replica'.
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи читать из default: не меньше
+# интервала копирования реплики.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Для нескольких процессов нужен общий бэкенд (memcached, redis):
+# иначе сигналы сбрасывают кеш только в своём процессе.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # LocMemCache вытесняет давно не читанные записи: при заполнении
+    # удаляется 1/CULL_FREQUENCY из них. Срок жизни ограничивает
+    # устаревшую копию, если чтение разминулось со сбросом ключа.
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+NOTE_CACHE_ALIAS = 'notes'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +134,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Бюджет SQL-запросов представлений (notes.queries.QueryBudgetMixin).
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_STRICT = False
+
+NOTES_PER_PAGE = 100
@@ -0,0 +1,40 @@
+"""
+Настройки для продакшена поверх settings.py.
+
+Запуск: DJANGO_SETTINGS_MODULE=yanote.settings_production.
+"""
+import copy
+
+from .settings import *  # noqa: F401, F403
+from .settings import TEMPLATES
+
+DEBUG = False
+
+QUERY_BUDGET_ENABLED = False
+
+# Шаблоны читаются и компилируются один раз на процесс. С явными
+# loaders APP_DIRS нужно выключить: app_directories уже в списке.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+options = TEMPLATES[0]['OPTIONS']
+TEMPLATES[0]['APP_DIRS'] = False
+options.update({
+    'debug': False,
+    'loaders': [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ],
+    'context_processors': [
+        processor for processor in options['context_processors']
+        if processor != 'django.template.context_processors.debug'
+    ],
+})
+
+# Общие для всех страниц шаблоны компилируем при старте процесса,
+# а не на первом запросе каждого воркера.
+TEMPLATE_PRELOAD = [
+    'base.html',
+    'includes/header.html',
+    'includes/errors.html',
+]
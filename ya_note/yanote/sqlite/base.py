@@ -0,0 +1,72 @@
+"""SQLite с настройками соединения для продакшена.
+
+Подключается через ``ENGINE``; PRAGMA можно переопределить в
+``OPTIONS['pragmas']``.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.backends.sqlite3 import base
+
+# Порядок важен: journal_mode задаётся первым.
+PRAGMAS = {
+    # Читатели не блокируют писателя, писатель — читателей.
+    'journal_mode': 'WAL',
+    # В WAL fsync только на контрольной точке; данные не теряются
+    # при падении процесса, только при отключении питания.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ: 64 МиБ на соединение.
+    'cache_size': -64 * 1024,
+    # Ждать освобождения блокировки вместо «database is locked».
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic(), внешняя транзакция которого — BEGIN IMMEDIATE.
+
+    Отложенная транзакция берёт блокировку на запись только при первом
+    изменении; если после её чтения писал кто-то другой, SQLite в WAL
+    сразу отвечает SQLITE_BUSY, не дожидаясь busy_timeout. Нужен там,
+    где транзакция читает, а потом пишет. Внутри другой транзакции —
+    обычная точка сохранения.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # Без автокоммита atomic() не начинает транзакцию сам, а только
+    # ставит точку сохранения; фиксируем и откатываем здесь.
+    connection.set_autocommit(False)
+    try:
+        connection.cursor().execute('BEGIN IMMEDIATE')
+        with transaction.atomic(using=using):
+            yield
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.set_autocommit(True)